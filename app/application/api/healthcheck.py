@@ -1,6 +1,20 @@
 from dataclasses import dataclass
+from typing import Annotated, Any
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from punq import Container
+
+from infrastructure.message_brokers.base import IMessageBroker
+from infrastructure.metrics.brokers import BrokerMetrics
+from infrastructure.repositories.users.base import IUserRepository
+from infrastructure.repositories.users.cached import CachedUserRepository
+from infrastructure.tracing.exporters import InMemorySpanExporter
+from infrastructure.tracing.tracer import Tracer
+from logic.init import init_container
+from logic.mediator.base import Mediator
+from logic.mediator.middlewares import LatencyMiddleware
+from logic.queries.cache import QueryResultCache
+from logic.queries.singleflight import SingleFlightMiddleware
 
 
 healthcheck_router = APIRouter()
@@ -17,3 +31,61 @@ OK_STATUS = OKStatus()
 @healthcheck_router.get("/", status_code=status.HTTP_200_OK)
 async def get_status() -> OKStatus:
     return OK_STATUS
+
+
+@healthcheck_router.get("/cache/", status_code=status.HTTP_200_OK)
+async def get_cache_stats(
+    container: Annotated[Container, Depends(init_container)],
+) -> dict[str, Any]:
+    """Hit and miss ratios of the application caches."""
+    stats = {}
+
+    user_repository = container.resolve(IUserRepository)
+    if isinstance(user_repository, CachedUserRepository):
+        stats["users"] = user_repository.get_stats()
+
+    stats["queries"] = container.resolve(QueryResultCache).get_stats()
+    stats["single_flight"] = container.resolve(SingleFlightMiddleware).stats.as_dict()
+
+    return stats
+
+
+@healthcheck_router.get("/latency/", status_code=status.HTTP_200_OK)
+async def get_latency_stats(
+    container: Annotated[Container, Depends(init_container)],
+) -> dict[str, Any]:
+    """Latency histograms per command/query type and per event handler."""
+    mediator: Mediator = container.resolve(Mediator)
+
+    return {
+        "handlers": container.resolve(LatencyMiddleware).registry.as_dict(),
+        "event_handlers": mediator.event_handler_latencies.as_dict(),
+    }
+
+
+@healthcheck_router.get("/broker/", status_code=status.HTTP_200_OK)
+async def get_broker_stats(
+    container: Annotated[Container, Depends(init_container)],
+) -> dict[str, Any]:
+    """Throughput, lag, batch sizes and handler latency per topic."""
+    message_broker: IMessageBroker = container.resolve(IMessageBroker)
+    # Refreshes the lag kept in the metrics.
+    await message_broker.get_lag()
+
+    return container.resolve(BrokerMetrics).as_dict()
+
+
+@healthcheck_router.get("/traces/{trace_id}/", status_code=status.HTTP_200_OK)
+async def get_trace(
+    trace_id: str,
+    container: Annotated[Container, Depends(init_container)],
+) -> list[dict[str, Any]]:
+    """Spans of one trace, kept only with TRACING_EXPORTER=memory."""
+    tracer: Tracer = container.resolve(Tracer)
+    if not isinstance(tracer.exporter, InMemorySpanExporter):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Spans are not kept in memory",
+        )
+
+    return [span.as_dict() for span in tracer.exporter.get_trace(trace_id)]
@@ -1,6 +1,15 @@
+import asyncio
+
 from infrastructure.message_brokers.base import IMessageBroker
+from infrastructure.message_brokers.relay import OutboxRelay
+from infrastructure.repositories.users.invalidation import (
+    UserCacheInvalidationConsumer,
+)
+from infrastructure.services.availability.base import IUserAvailabilityService
 from infrastructure.services.smtp.scheduler.base import IScheduler
+from infrastructure.tracing.tracer import Tracer
 from logic.init import init_container
+from settings.settings import Settings
 
 
 async def init_message_broker():
@@ -9,6 +18,16 @@ async def init_message_broker():
     await message_broker.start()
 
 
+async def init_subscription_state_topic():
+    container = init_container()
+    settings: Settings = container.resolve(Settings)
+    message_broker: IMessageBroker = container.resolve(IMessageBroker)
+    await message_broker.create_compacted_topic(
+        settings.user_subscription_state_topic,
+        settings.user_subscription_state_partitions,
+    )
+
+
 async def close_message_broker():
     container = init_container()
     message_broker: IMessageBroker = container.resolve(IMessageBroker)
@@ -25,3 +44,59 @@ async def close_scheduler():
     container = init_container()
     email_scheduler: IScheduler = container.resolve(IScheduler)
     await email_scheduler.stop()
+
+
+async def init_availability_service():
+    container = init_container()
+    availability_service: IUserAvailabilityService = container.resolve(
+        IUserAvailabilityService
+    )
+    await availability_service.warm_up()
+
+
+async def init_outbox_relay():
+    container = init_container()
+    outbox_relay: OutboxRelay = container.resolve(OutboxRelay)
+    await outbox_relay.start()
+
+
+async def close_outbox_relay():
+    container = init_container()
+    outbox_relay: OutboxRelay = container.resolve(OutboxRelay)
+    await outbox_relay.stop()
+
+
+async def init_user_cache_invalidation():
+    container = init_container()
+    if not _is_user_cache_invalidation_enabled(container.resolve(Settings)):
+        return
+
+    consumer: UserCacheInvalidationConsumer = container.resolve(
+        UserCacheInvalidationConsumer
+    )
+    await consumer.start()
+
+
+async def close_user_cache_invalidation():
+    container = init_container()
+    if not _is_user_cache_invalidation_enabled(container.resolve(Settings)):
+        return
+
+    consumer: UserCacheInvalidationConsumer = container.resolve(
+        UserCacheInvalidationConsumer
+    )
+    await consumer.stop()
+
+
+async def close_tracer():
+    container = init_container()
+    tracer: Tracer = container.resolve(Tracer)
+    if tracer.exporter is not None:
+        # Waits for the exporter to write out the spans still queued.
+        await asyncio.to_thread(tracer.exporter.shutdown)
+
+
+def _is_user_cache_invalidation_enabled(settings: Settings) -> bool:
+    # An in-memory broker means a single instance, whose own writes already
+    # invalidate its cache.
+    return settings.USER_CACHE_ENABLED and settings.MESSAGE_BROKER_BACKEND == "kafka"
@@ -4,24 +4,41 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from application.api.lifespan import (
     close_message_broker,
+    close_outbox_relay,
     close_scheduler,
+    close_tracer,
+    close_user_cache_invalidation,
+    init_availability_service,
     init_message_broker,
+    init_outbox_relay,
     init_scheduler,
+    init_subscription_state_topic,
+    init_user_cache_invalidation,
 )
 
 from application.api.healthcheck import healthcheck_router
+from application.api.middlewares import RequestTracingMiddleware
 from application.api.users.routers import user_router
 from application.api.users.routers import auth_router
+from infrastructure.tracing.tracer import Tracer
+from logic.init import init_container
 from settings.settings import settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_message_broker()
+    await init_subscription_state_topic()
+    await init_outbox_relay()
     await init_scheduler()
+    await init_availability_service()
+    await init_user_cache_invalidation()
     yield
+    await close_user_cache_invalidation()
     await close_scheduler()
+    await close_outbox_relay()
     await close_message_broker()
+    await close_tracer()
 
 
 def create_app() -> FastAPI:
@@ -43,5 +60,8 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(
+        RequestTracingMiddleware, tracer=init_container().resolve(Tracer)
+    )
 
     return app
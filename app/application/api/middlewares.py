@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from infrastructure.tracing.spans import (
+    TRACEPARENT_HEADER,
+    format_traceparent,
+    parse_traceparent,
+)
+from infrastructure.tracing.tracer import Tracer
+
+
+@dataclass
+class RequestTracingMiddleware:
+    """Opens the root span of every HTTP request.
+
+    An incoming `traceparent` header is continued; the response carries the
+    `traceparent` of the request span so callers can look the trace up.
+    """
+
+    app: ASGIApp
+    tracer: Tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        parent = parse_traceparent(
+            headers.get(TRACEPARENT_HEADER.encode(), b"").decode("latin-1")
+        )
+
+        with self.tracer.start_span(
+            f"{scope['method']} {scope['path']}", parent=parent
+        ) as span:
+            traceparent = format_traceparent(span.context).encode()
+
+            async def send_with_traceparent(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.attributes["status_code"] = message["status"]
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (TRACEPARENT_HEADER.encode(), traceparent),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_traceparent)
+
+            # Name the span after the route template once routing is done.
+            route_path = getattr(scope.get("route"), "path", None)
+            if route_path is not None:
+                span.name = f"{scope['method']} {route_path}"
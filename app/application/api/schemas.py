@@ -13,4 +13,5 @@ class SBaseQueryResponse(BaseModel, Generic[IL]):
     count: int
     limit: int
     offset: int
+    next_cursor: str | None = None
     items: IL
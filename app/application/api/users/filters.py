@@ -11,8 +11,12 @@ class GetUsersFilters(BaseGetAllFilters):
     limit: int = 10
     offset: int = 0
     show_deleted: bool = False
+    cursor: str | None = None
 
     def to_infrastructure_filters(self):
         return GetUsersInfrastructureFilters(
-            limit=self.limit, offset=self.offset, show_deleted=self.show_deleted
+            limit=self.limit,
+            offset=self.offset,
+            show_deleted=self.show_deleted,
+            cursor=self.cursor,
         )
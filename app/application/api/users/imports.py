@@ -0,0 +1,212 @@
+import csv
+import io
+from collections.abc import AsyncIterator, Iterator
+from tempfile import SpooledTemporaryFile
+from typing import Any, BinaryIO, NoReturn, TextIO
+
+import orjson
+from fastapi import HTTPException, Request, status
+
+from logic.commands.users import UserImportRow, get_mail_domain
+from logic.exceptions.users import InvalidUserImportRowException
+
+
+CSV_FORMAT = "csv"
+NDJSON_FORMAT = "ndjson"
+
+IMPORT_FORMATS = {
+    "text/csv": CSV_FORMAT,
+    "application/x-ndjson": NDJSON_FORMAT,
+    "application/jsonl": NDJSON_FORMAT,
+}
+IMPORT_FIELDS = ("username", "email", "user_timezone")
+
+_TRUE_VALUES = frozenset({"true", "1", "yes"})
+_FALSE_VALUES = frozenset({"false", "0", "no", ""})
+
+
+def get_import_format(content_type: str | None) -> str | None:
+    media_type = (content_type or "").partition(";")[0].strip().lower()
+    return IMPORT_FORMATS.get(media_type)
+
+
+async def spool_request_body(
+    request: Request, max_memory_size: int, max_size: int
+) -> BinaryIO:
+    """Read the whole request body before the import starts.
+
+    The import runs in one transaction, which must not wait for a slow
+    client. Bodies larger than `max_memory_size` bytes go to a temporary
+    file, bodies larger than `max_size` bytes are refused with 413. The
+    body is checked to be UTF-8 on the way, line by line, so an error can
+    name its line.
+    """
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_size:
+        _raise_too_large(max_size)
+
+    body = SpooledTemporaryFile(max_size=max_memory_size)
+    size = 0
+    line_number = 0
+    tail = b""
+
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_size:
+                _raise_too_large(max_size)
+
+            body.write(chunk)
+            *lines, tail = (tail + chunk).split(b"\n")
+            for line in lines:
+                line_number += 1
+                _check_utf8(line_number, line)
+
+        _check_utf8(line_number + 1, tail)
+    except BaseException:
+        body.close()
+        raise
+
+    body.seek(0)
+
+    return body
+
+
+async def collect_mail_domains(
+    body: BinaryIO, import_format: str, batch_size: int
+) -> frozenset[str]:
+    """Read a spooled body once for the mail domains of its rows and rewind
+    it for the import."""
+    domains = set()
+    async for rows in iter_user_import_batches(body, import_format, batch_size):
+        domains.update(get_mail_domain(row.email) for row in rows)
+
+    body.seek(0)
+
+    return frozenset(domains)
+
+
+async def iter_user_import_batches(
+    body: BinaryIO, import_format: str, batch_size: int
+) -> AsyncIterator[list[UserImportRow]]:
+    """Parse a spooled body into batches of rows.
+
+    A CSV body starts with a header naming its columns; quoted values may
+    span lines. An NDJSON body holds one record per line.
+    """
+    text = io.TextIOWrapper(body, encoding="utf-8", newline="")
+    if import_format == CSV_FORMAT:
+        records = _iter_csv_records(text)
+    else:
+        records = _iter_json_records(text)
+
+    try:
+        rows: list[UserImportRow] = []
+        for line_number, record in records:
+            rows.append(_convert_record(line_number, record))
+            if len(rows) >= batch_size:
+                yield rows
+                rows = []
+
+        if rows:
+            yield rows
+    finally:
+        # Otherwise closing the wrapper would close the body along with it.
+        text.detach()
+
+
+def _iter_csv_records(text: TextIO) -> Iterator[tuple[int, dict[str, Any]]]:
+    reader = csv.reader(text)
+    header = None
+    line_number = 1
+
+    try:
+        for record in reader:
+            # A record starts on the line after the end of the previous one.
+            record_line_number, line_number = line_number, reader.line_num + 1
+            if len(record) <= 1 and not "".join(record).strip():
+                continue
+
+            if header is None:
+                header = record
+                continue
+
+            yield record_line_number, _zip_csv_record(
+                record_line_number, header, record
+            )
+    except csv.Error as error:
+        raise InvalidUserImportRowException(line_number, str(error))
+
+
+def _iter_json_records(text: TextIO) -> Iterator[tuple[int, dict[str, Any]]]:
+    for line_number, line in enumerate(text, start=1):
+        if line.strip():
+            yield line_number, _load_json_record(line_number, line)
+
+
+def _raise_too_large(max_size: int) -> NoReturn:
+    raise HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"The import body must not exceed {max_size} bytes",
+    )
+
+
+def _check_utf8(line_number: int, line: bytes) -> None:
+    try:
+        line.decode("utf-8")
+    except UnicodeDecodeError:
+        raise InvalidUserImportRowException(line_number, "not valid UTF-8")
+
+
+def _zip_csv_record(
+    line_number: int, header: list[str], record: list[str]
+) -> dict[str, Any]:
+    if len(record) != len(header):
+        raise InvalidUserImportRowException(
+            line_number, f"expected {len(header)} columns, got {len(record)}"
+        )
+
+    return dict(zip(header, record))
+
+
+def _load_json_record(line_number: int, line: str) -> dict[str, Any]:
+    try:
+        record = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        raise InvalidUserImportRowException(line_number, "not valid JSON")
+
+    if not isinstance(record, dict):
+        raise InvalidUserImportRowException(line_number, "expected a JSON object")
+
+    return record
+
+
+def _convert_record(line_number: int, record: dict[str, Any]) -> UserImportRow:
+    missing_fields = [name for name in IMPORT_FIELDS if name not in record]
+    if missing_fields:
+        raise InvalidUserImportRowException(
+            line_number, f"missing {', '.join(missing_fields)}"
+        )
+
+    return UserImportRow(
+        line=line_number,
+        username=str(record["username"]),
+        email=str(record["email"]),
+        user_timezone=str(record["user_timezone"]),
+        is_subscribed=_parse_bool(line_number, record.get("is_subscribed", False)),
+    )
+
+
+def _parse_bool(line_number: int, value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+
+    normalized_value = str(value).strip().lower()
+    if normalized_value in _TRUE_VALUES:
+        return True
+    if normalized_value in _FALSE_VALUES:
+        return False
+
+    raise InvalidUserImportRowException(
+        line_number, f"is_subscribed is not a boolean: {value}"
+    )
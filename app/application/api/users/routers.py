@@ -1,10 +1,19 @@
 from typing import Annotated
 from punq import Container
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 
 from application.api.schemas import SErrorMessage
 from application.api.users.filters import GetUsersFilters
+from application.api.users.imports import (
+    IMPORT_FORMATS,
+    collect_mail_domains,
+    get_import_format,
+    iter_user_import_batches,
+    spool_request_body,
+)
 from application.api.users.schemas import (
+    SBulkSubscriptionIn,
+    SBulkSubscriptionOut,
     SChangeUsername,
     SConfirmIn,
     SConfirmOut,
@@ -12,14 +21,19 @@ from application.api.users.schemas import (
     SCreateUserOut,
     SGetUser,
     SGetUsersQueryResponse,
+    SImportUsersOut,
     SLoginIn,
     SLoginOut,
 )
 from domain.exceptions.base import ApplicationException
+from infrastructure.repositories.common.filters.cursors import encode_cursor
 from logic.commands.users import (
+    BulkSubscribeToEmailSenderCommand,
+    BulkUnsubscribeFromEmailSenderCommand,
     ChangeUsernameCommand,
     CreateUserCommand,
     DeleteUserCommand,
+    ImportUsersCommand,
     RestoreUserCommand,
     SubscribeToEmailSenderCommand,
     UnsubscribeFromEmailSenderCommand,
@@ -29,9 +43,11 @@ from logic.commands.users import (
 from logic.init import init_container
 from logic.mediator.base import Mediator
 from logic.queries.users import (
+    CheckMailDomainsQuery,
     GetUserByIdQuery,
     GetUsersQuery,
 )
+from settings.settings import Settings
 
 
 user_router = APIRouter()
@@ -68,6 +84,71 @@ async def create_user(
     return SCreateUserOut.from_entity(user)
 
 
+@user_router.post(
+    "/import/",
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {"model": SImportUsersOut},
+        status.HTTP_400_BAD_REQUEST: {"model": SErrorMessage},
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {"model": SErrorMessage},
+        status.HTTP_415_UNSUPPORTED_MEDIA_TYPE: {"model": SErrorMessage},
+    },
+)
+async def import_users(
+    request: Request,
+    container: Annotated[Container, Depends(init_container)],
+) -> SImportUsersOut:
+    """Import users from a CSV or NDJSON request body.
+
+    One user per line with `username`, `email`, `user_timezone` and an
+    optional `is_subscribed`. Rows that fail validation or collide with an
+    existing user are reported in `rejected`; a malformed row aborts the
+    whole import.
+    """
+    import_format = get_import_format(request.headers.get("content-type"))
+    if import_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Expected one of: {', '.join(IMPORT_FORMATS)}",
+        )
+
+    mediator: Mediator = container.resolve(Mediator)
+    settings: Settings = container.resolve(Settings)
+
+    try:
+        body = await spool_request_body(
+            request,
+            max_memory_size=settings.USER_IMPORT_SPOOL_MEMORY_SIZE,
+            max_size=settings.USER_IMPORT_MAX_BODY_SIZE,
+        )
+        with body:
+            # Resolved before the import's transaction starts, which DNS
+            # lookups would otherwise keep open.
+            domains = await collect_mail_domains(
+                body,
+                import_format=import_format,
+                batch_size=settings.USER_IMPORT_BATCH_SIZE,
+            )
+            domain_verdicts = await mediator.handle_query(
+                CheckMailDomainsQuery(domains=domains)
+            )
+
+            result, *_ = await mediator.handle_command(
+                ImportUsersCommand(
+                    batches=iter_user_import_batches(
+                        body,
+                        import_format=import_format,
+                        batch_size=settings.USER_IMPORT_BATCH_SIZE,
+                    ),
+                    domain_verdicts=domain_verdicts,
+                )
+            )
+    except ApplicationException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+
+    return SImportUsersOut.from_result(result)
+
+
 @auth_router.post(
     "/login/",
     status_code=status.HTTP_200_OK,
@@ -133,7 +214,12 @@ async def get_all_users(
     container: Annotated[Container, Depends(init_container)],
     filters: GetUsersFilters = Depends(),
 ) -> SGetUsersQueryResponse:
-    """Get all users."""
+    """Get all users.
+
+    Pass `next_cursor` from the previous response as `cursor` to fetch the
+    next page; it is resolved with an index seek, so page N costs the same as
+    page 1. `offset` is ignored when a cursor is given.
+    """
     mediator: Mediator = container.resolve(Mediator)
 
     try:
@@ -143,10 +229,16 @@ async def get_all_users(
     except ApplicationException as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
 
+    next_cursor = None
+    if len(users) == filters.limit:
+        last_user = users[-1]
+        next_cursor = encode_cursor(last_user.created_at, last_user.oid)
+
     return SGetUsersQueryResponse(
         count=count,
         limit=filters.limit,
         offset=filters.offset,
+        next_cursor=next_cursor,
         items=[SGetUser.from_entity(user) for user in users],
     )
 
@@ -238,6 +330,64 @@ async def unsubscribe_from_email_sender(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
 
 
+@user_router.patch(
+    "/subscribe/",
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {"model": SBulkSubscriptionOut},
+        status.HTTP_400_BAD_REQUEST: {"model": SErrorMessage},
+    },
+)
+async def bulk_subscribe_to_email_sender(
+    user_in: SBulkSubscriptionIn,
+    container: Annotated[Container, Depends(init_container)],
+) -> SBulkSubscriptionOut:
+    """Subscribe many users at once.
+
+    Returns the users that were actually subscribed; unknown, deleted and
+    already subscribed users are skipped.
+    """
+    mediator: Mediator = container.resolve(Mediator)
+
+    try:
+        updated_oids, *_ = await mediator.handle_command(
+            BulkSubscribeToEmailSenderCommand(user_oids=tuple(user_in.user_oids))
+        )
+    except ApplicationException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+
+    return SBulkSubscriptionOut(updated_oids=updated_oids)
+
+
+@user_router.patch(
+    "/unsubscribe/",
+    status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_200_OK: {"model": SBulkSubscriptionOut},
+        status.HTTP_400_BAD_REQUEST: {"model": SErrorMessage},
+    },
+)
+async def bulk_unsubscribe_from_email_sender(
+    user_in: SBulkSubscriptionIn,
+    container: Annotated[Container, Depends(init_container)],
+) -> SBulkSubscriptionOut:
+    """Unsubscribe many users at once.
+
+    Returns the users that were actually unsubscribed; unknown, deleted and
+    not subscribed users are skipped.
+    """
+    mediator: Mediator = container.resolve(Mediator)
+
+    try:
+        updated_oids, *_ = await mediator.handle_command(
+            BulkUnsubscribeFromEmailSenderCommand(user_oids=tuple(user_in.user_oids))
+        )
+    except ApplicationException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+
+    return SBulkSubscriptionOut(updated_oids=updated_oids)
+
+
 @user_router.patch(
     "/{user_oid}/restore/",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -5,6 +5,7 @@ from pytz import all_timezones
 
 from application.api.schemas import SBaseQueryResponse
 from domain.entities.users import UserEntity
+from logic.commands.users import UsersImportResult
 
 
 class SCreateUserIn(BaseModel):
@@ -90,8 +91,36 @@ class SGetUser(BaseModel):
         )
 
 
+class SImportRejection(BaseModel):
+    line: int
+    message: str
+
+
+class SImportUsersOut(BaseModel):
+    imported: int
+    rejected: list[SImportRejection]
+
+    @classmethod
+    def from_result(cls, result: UsersImportResult) -> "SImportUsersOut":
+        return cls(
+            imported=result.imported,
+            rejected=[
+                SImportRejection(line=rejection.line, message=rejection.message)
+                for rejection in result.rejected
+            ],
+        )
+
+
 class SChangeUsername(BaseModel):
     new_username: str
 
 
+class SBulkSubscriptionIn(BaseModel):
+    user_oids: list[str]
+
+
+class SBulkSubscriptionOut(BaseModel):
+    updated_oids: list[str]
+
+
 class SGetUsersQueryResponse(SBaseQueryResponse[list[SGetUser]]): ...
@@ -0,0 +1,96 @@
+"""Re-emit user events for every existing user, e.g. to seed a new consumer.
+
+Run from the `app` directory; an interrupted run resumes from its checkpoint:
+
+    python -m application.cli.backfill
+"""
+
+import argparse
+import asyncio
+import logging
+
+from infrastructure.message_brokers.backfill import (
+    BackfillCheckpoint,
+    UserEventBackfill,
+)
+from infrastructure.message_brokers.base import IMessageBroker
+from infrastructure.message_brokers.envelopes import EventEnvelopeRegistry
+from infrastructure.repositories.users.base import IUserRepository
+from logic.init import init_container
+from settings.settings import Settings
+
+
+def parse_args(settings: Settings) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--created-topic",
+        dest="created_topics",
+        action="append",
+        default=[],
+        help="topic to send UserCreatedEvent to, repeatable (default: none)",
+    )
+    parser.add_argument(
+        "--subscribed-topic",
+        dest="subscribed_topics",
+        action="append",
+        default=None,
+        help=(
+            "topic to send UserSubscribedEvent to, repeatable "
+            "(default: the subscription state topic)"
+        ),
+    )
+    parser.add_argument("--chunk-size", type=int, default=settings.BACKFILL_CHUNK_SIZE)
+    parser.add_argument(
+        "--max-users-per-second",
+        type=float,
+        default=settings.BACKFILL_MAX_USERS_PER_SECOND,
+    )
+    parser.add_argument("--checkpoint", default=settings.BACKFILL_CHECKPOINT_PATH)
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="ignore the checkpoint and start from the first user",
+    )
+
+    args = parser.parse_args()
+    if args.subscribed_topics is None:
+        # Running schedulers need no backfill; the compacted topic is what a
+        # starting one reads.
+        args.subscribed_topics = [settings.user_subscription_state_topic]
+
+    return args
+
+
+async def main() -> None:
+    container = init_container()
+    settings: Settings = container.resolve(Settings)
+    args = parse_args(settings)
+
+    message_broker: IMessageBroker = container.resolve(IMessageBroker)
+    backfill = UserEventBackfill(
+        user_repository=container.resolve(IUserRepository),
+        message_broker=message_broker,
+        envelope_registry=container.resolve(EventEnvelopeRegistry),
+        checkpoint=(
+            BackfillCheckpoint(path=args.checkpoint)
+            if args.restart
+            else BackfillCheckpoint.load(args.checkpoint)
+        ),
+        created_topics=args.created_topics,
+        subscribed_topics=args.subscribed_topics,
+        chunk_size=args.chunk_size,
+        max_users_per_second=args.max_users_per_second,
+    )
+
+    await message_broker.start()
+    try:
+        checkpoint = await backfill.run()
+    finally:
+        await message_broker.stop()
+
+    print(f"Backfilled {checkpoint.users} users, {checkpoint.messages} messages")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""End-to-end event throughput through the in-memory message broker.
+
+Run from the `app` directory (no Kafka connection is made):
+
+    python -m benchmarks.broker
+"""
+
+import asyncio
+from time import perf_counter
+
+import orjson
+
+from infrastructure.message_brokers.base import BrokerMessage
+from infrastructure.message_brokers.memory import (
+    InMemoryBrokerLog,
+    InMemoryMessageBroker,
+)
+
+
+TOPIC = "user_subscribed_topic"
+
+
+async def consume(broker: InMemoryMessageBroker, counts: dict[int, int]) -> None:
+    async for messages in broker.consume_batches([TOPIC], max_records=500):
+        for message in messages:
+            orjson.loads(message.value)
+        counts[id(broker)] += len(messages)
+        await broker.commit(messages)
+
+
+async def main(total: int = 200_000, batch_size: int = 500) -> None:
+    log = InMemoryBrokerLog(partitions=8)
+    producer = InMemoryMessageBroker(log=log, group_id="producer")
+    # Two members of the scheduler group split the partitions, the cache
+    # group gets its own copy of every message.
+    consumers = [
+        InMemoryMessageBroker(log=log, group_id="scheduler"),
+        InMemoryMessageBroker(log=log, group_id="scheduler"),
+        InMemoryMessageBroker(log=log, group_id="user-cache"),
+    ]
+    counts = {id(consumer): 0 for consumer in consumers}
+    tasks = [asyncio.create_task(consume(consumer, counts)) for consumer in consumers]
+
+    started_at = perf_counter()
+    for start in range(0, total, batch_size):
+        await producer.send_batch(
+            BrokerMessage(
+                topic=TOPIC,
+                key=f"user-{index % 10_000}".encode(),
+                value=orjson.dumps({"user_oid": f"user-{index % 10_000}"}),
+            )
+            for index in range(start, min(start + batch_size, total))
+        )
+        await asyncio.sleep(0)
+
+    while log.get_lag("scheduler", TOPIC) or log.get_lag("user-cache", TOPIC):
+        await asyncio.sleep(0)
+    elapsed = perf_counter() - started_at
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    delivered = sum(counts.values())
+    print(f"produced {total} messages, delivered {delivered} in {elapsed:.2f}s")
+    print(f"{delivered / elapsed:,.0f} deliveries/s")
+    print(f"scheduler members: {[counts[id(c)] for c in consumers[:2]]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""Per-request mediator overhead, before and after making it a singleton.
+
+Run from the `app` directory (no container is built, no database or Kafka
+connection is made):
+
+    python -m benchmarks.mediator
+"""
+
+import asyncio
+from dataclasses import dataclass, make_dataclass
+from time import perf_counter
+
+from domain.events.base import BaseEvent
+from infrastructure.tracing.tracer import Tracer
+from logic.commands.base import BaseCommand, CommandHandler
+from logic.events.base import EventHandler
+from logic.mediator.base import Mediator
+from logic.mediator.middlewares import (
+    LatencyMiddleware,
+    SlowCallLoggingMiddleware,
+    TracingMiddleware,
+)
+from logic.queries.singleflight import SingleFlightMiddleware
+
+
+# As many registrations as `init_mediator` makes.
+COMMANDS = 11
+EVENTS = 5
+
+
+@dataclass(frozen=True)
+class NoopCommandHandler(CommandHandler[BaseCommand, None]):
+    async def handle(self, command: BaseCommand) -> None: ...
+
+
+@dataclass
+class NoopEventHandler(EventHandler[BaseEvent, None]):
+    message_broker: None = None
+
+    async def handle(self, event: BaseEvent) -> None: ...
+
+
+COMMAND_TYPES = [
+    make_dataclass(f"NoopCommand{index}", [], bases=(BaseCommand,), frozen=True)
+    for index in range(COMMANDS)
+]
+EVENT_TYPES = [
+    make_dataclass(f"NoopEvent{index}", [], bases=(BaseEvent,), namespace={"title": ""})
+    for index in range(EVENTS)
+]
+
+
+def build_mediator() -> Mediator:
+    """What every request paid for before the mediator became a singleton."""
+    tracer = Tracer()
+    mediator = Mediator(tracer=tracer)
+    mediator.add_middleware(TracingMiddleware(tracer=tracer))
+    mediator.add_middleware(LatencyMiddleware())
+    mediator.add_middleware(SlowCallLoggingMiddleware(threshold=0.5))
+    mediator.add_middleware(SingleFlightMiddleware())
+
+    for command_type in COMMAND_TYPES:
+        mediator.register_command(
+            command_type, [NoopCommandHandler(_mediator=mediator)]
+        )
+    for event_type in EVENT_TYPES:
+        mediator.register_event(event_type, [NoopEventHandler()])
+
+    return mediator
+
+
+async def measure(label: str, iterations: int, call) -> None:
+    started_at = perf_counter()
+    for _ in range(iterations):
+        result = call()
+        if asyncio.iscoroutine(result):
+            await result
+    elapsed = perf_counter() - started_at
+
+    print(f"{label:<40} {elapsed / iterations * 1_000_000:>10.2f} us/call")
+
+
+async def main(iterations: int = 100_000) -> None:
+    mediator = build_mediator()
+    bare_mediator = Mediator()
+    bare_mediator.register_command(
+        COMMAND_TYPES[0], [NoopCommandHandler(_mediator=bare_mediator)]
+    )
+    command = COMMAND_TYPES[0]()
+    events = [EVENT_TYPES[0]()]
+
+    await measure("build Mediator (per request)", iterations, build_mediator)
+    await measure(
+        "handle_command (no middlewares)",
+        iterations,
+        lambda: bare_mediator.handle_command(command),
+    )
+    await measure(
+        "handle_command (middlewares)",
+        iterations,
+        lambda: mediator.handle_command(command),
+    )
+    await measure("publish (one event)", iterations, lambda: mediator.publish(events))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
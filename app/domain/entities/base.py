@@ -24,6 +24,11 @@ class BaseEntity(ABC):
         default_factory=lambda: datetime.now(UTC),
         kw_only=True,
     )
+    _changed_fields: set[str] = field(
+        default_factory=set,
+        kw_only=True,
+        repr=False,
+    )
 
     def __hash__(self) -> int:
         return hash(self.oid)
@@ -39,3 +44,12 @@ class BaseEntity(ABC):
         self._events.clear()
 
         return registered_events
+
+    def mark_changed(self, *field_names: str) -> None:
+        self._changed_fields.update(field_names)
+
+    def get_changed_fields(self) -> set[str]:
+        return copy(self._changed_fields)
+
+    def clear_changed_fields(self) -> None:
+        self._changed_fields.clear()
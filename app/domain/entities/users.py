@@ -70,18 +70,20 @@ class UserEntity(BaseEntity):
         self._validate_not_deleted()
         old_username = self.username
         self.username = new_username
+        self.mark_changed("username")
 
         self.register_event(
             UserChangedUsernameEvent(
                 user_oid=self.oid,
-                old_username=old_username,
-                new_username=new_username,
+                old_username=old_username.as_generic_type(),
+                new_username=new_username.as_generic_type(),
             )
         )
 
     async def subscribe_to_email_sender(self) -> None:
         self._validate_not_deleted()
         self.is_subscribed = True
+        self.mark_changed("is_subscribed")
 
         self.register_event(
             UserSubscribedEvent(
@@ -96,6 +98,7 @@ class UserEntity(BaseEntity):
         self._validate_not_deleted()
         self._validate_not_subscribed()
         self.is_subscribed = False
+        self.mark_changed("is_subscribed")
 
         self.register_event(
             UserUnsubscribedEvent(
@@ -109,6 +112,7 @@ class UserEntity(BaseEntity):
         self._validate_deleted()
         self.is_deleted = False
         self.deleted_at = None
+        self.mark_changed("is_deleted", "deleted_at")
 
         self.register_event(
             RestoreUserEvent(
@@ -133,6 +137,7 @@ class UserEntity(BaseEntity):
         self._validate_not_deleted()
         self.is_deleted = True
         self.deleted_at = datetime.now(UTC)
+        self.mark_changed("is_deleted", "deleted_at")
 
         self.register_event(
             UserDeletedEvent(
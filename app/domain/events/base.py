@@ -7,6 +7,8 @@ from uuid import uuid4
 
 @dataclass
 class BaseEvent(ABC):
+    # Compact envelopes carry field values by position, and these fields come
+    # first in every event: adding one here would shift all the others.
     event_id: str = field(default_factory=lambda: str(uuid4()), kw_only=True)
 
     title: ClassVar[str]
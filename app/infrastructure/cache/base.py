@@ -0,0 +1,54 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.hits / self.requests if self.requests else 0.0
+
+    @property
+    def miss_ratio(self) -> float:
+        return self.misses / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+            "miss_ratio": self.miss_ratio,
+        }
+
+
+class ICache(ABC):
+    stats: CacheStats
+
+    @abstractmethod
+    async def get(self, key: str) -> Any | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any) -> None: ...
+
+    @abstractmethod
+    async def add(self, key: str, value: Any) -> None:
+        """Like `set`, unless ``key`` holds a value or a tombstone."""
+
+    @abstractmethod
+    async def tombstone(self, key: str, ttl: float) -> None:
+        """Drop the value of ``key`` and keep `add` from storing another one
+        for ``ttl`` seconds. `get` reports a tombstone as a miss."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    async def clear(self) -> None: ...
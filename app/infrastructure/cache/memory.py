@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any
+
+from infrastructure.cache.base import CacheStats, ICache
+
+
+_TOMBSTONE = object()
+
+
+@dataclass
+class TTLLRUCache(ICache):
+    """In-process cache bounded by size (least recently used entries are
+    evicted first) and by entry age."""
+
+    maxsize: int
+    ttl: float
+    stats: CacheStats = field(default_factory=CacheStats)
+    _entries: OrderedDict[str, tuple[float, Any]] = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+
+    async def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= monotonic():
+            del self._entries[key]
+            self.stats.misses += 1
+            return None
+
+        if value is _TOMBSTONE:
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._put(key, value, self.ttl)
+
+    async def add(self, key: str, value: Any) -> None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= monotonic():
+            self._put(key, value, self.ttl)
+
+    async def tombstone(self, key: str, ttl: float) -> None:
+        self._put(key, _TOMBSTONE, ttl)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _put(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
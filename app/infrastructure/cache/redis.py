@@ -0,0 +1,73 @@
+from dataclasses import dataclass, field
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from infrastructure.cache.base import CacheStats, ICache
+
+
+# Cached values are never empty, so an empty one can mark a tombstone.
+TOMBSTONE = b""
+
+
+@dataclass
+class RedisCache(ICache):
+    """Shared cache tier. Redis errors are treated as misses so that an
+    unavailable Redis degrades to database reads instead of failing
+    requests."""
+
+    redis_client: aioredis.Redis
+    ttl: int
+    prefix: str
+    stats: CacheStats = field(default_factory=CacheStats)
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            value = await self.redis_client.get(self._build_key(key))
+        except RedisError:
+            value = None
+
+        if value is None or value == TOMBSTONE:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        try:
+            await self.redis_client.set(self._build_key(key), value, ex=self.ttl)
+        except RedisError:
+            pass
+
+    async def add(self, key: str, value: bytes) -> None:
+        try:
+            await self.redis_client.set(
+                self._build_key(key), value, ex=self.ttl, nx=True
+            )
+        except RedisError:
+            pass
+
+    async def tombstone(self, key: str, ttl: float) -> None:
+        try:
+            await self.redis_client.set(
+                self._build_key(key), TOMBSTONE, px=max(1, round(ttl * 1000))
+            )
+        except RedisError:
+            pass
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.redis_client.delete(self._build_key(key))
+        except RedisError:
+            pass
+
+    async def clear(self) -> None:
+        try:
+            async for key in self.redis_client.scan_iter(match=f"{self.prefix}*"):
+                await self.redis_client.delete(key)
+        except RedisError:
+            pass
+
+    def _build_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+
+from infrastructure.exceptions.base import ServiceException
+
+
+@dataclass(eq=False)
+class BloomFilterUnavailableException(ServiceException):
+    error: Exception
+
+    @property
+    def message(self) -> str:
+        return f"The bloom filter is unavailable: {self.error}"
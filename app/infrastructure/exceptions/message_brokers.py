@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+
+from infrastructure.exceptions.base import InfrastructureException
+
+
+@dataclass(eq=False)
+class EventDecodingException(InfrastructureException):
+    reason: str
+
+    @property
+    def message(self) -> str:
+        return f"Broker message could not be decoded into an event: {self.reason}"
@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+
+from infrastructure.exceptions.base import RepositoryException
+
+
+@dataclass(eq=False)
+class UniqueViolationException(RepositoryException):
+    constraint: str | None
+
+    @property
+    def message(self) -> str:
+        return f"Unique constraint {self.constraint} is violated"
+
+
+@dataclass(eq=False)
+class InvalidCursorException(RepositoryException):
+    cursor: str
+
+    @property
+    def message(self) -> str:
+        return f"The provided pagination cursor is invalid: {self.cursor}"
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+
+import orjson
+
+from domain.entities.users import UserEntity
+from domain.events.base import BaseEvent
+from domain.events.users import (
+    UserCreatedEvent,
+    UserSubscribedEvent,
+    UserUnsubscribedEvent,
+)
+from infrastructure.message_brokers.base import BrokerMessage, IMessageProducer
+from infrastructure.message_brokers.converters import convert_event_to_broker_key
+from infrastructure.message_brokers.envelopes import EventEnvelopeRegistry
+from infrastructure.repositories.common.filters.cursors import encode_cursor
+from infrastructure.repositories.users.base import IUserRepository
+from infrastructure.repositories.users.filters.users import GetUsersFilters
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BackfillCheckpoint:
+    """Progress of a backfill, kept in a JSON file at `path`."""
+
+    path: str
+    cursor: str | None = None
+    users: int = 0
+    messages: int = 0
+
+    @classmethod
+    def load(cls, path: str) -> "BackfillCheckpoint":
+        try:
+            with open(path, "rb") as file:
+                return cls(path=path, **orjson.loads(file.read()))
+        except FileNotFoundError:
+            return cls(path=path)
+
+    def save(self) -> None:
+        # Written aside and renamed over the old file, so a crash can never
+        # leave half a checkpoint behind.
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(
+                orjson.dumps(
+                    {
+                        "cursor": self.cursor,
+                        "users": self.users,
+                        "messages": self.messages,
+                    }
+                )
+            )
+        os.replace(temporary_path, self.path)
+
+
+@dataclass
+class UserEventBackfill:
+    """Re-emits `UserCreatedEvent`/`UserSubscribedEvent` for existing users.
+
+    Users are read with keyset pagination, `chunk_size` at a time: every
+    chunk is a short index range scan rather than one long-running query.
+    Each chunk is sent as one producer batch and the checkpoint is saved once
+    the batch is acknowledged, so a restarted backfill resumes after the
+    last saved chunk and sends at most one chunk twice. Throughput is capped
+    at `max_users_per_second` to leave the database to live traffic.
+
+    A user may unsubscribe between the read of its chunk and the send, and
+    the live `UserUnsubscribedEvent` may then reach a compacted topic before
+    the stale `UserSubscribedEvent`, which compaction would keep for good.
+    So every chunk is read again once it is acknowledged, and users who are
+    no longer subscribed get a `UserUnsubscribedEvent` after the stale one.
+    Only a user who unsubscribes and subscribes again within that window can
+    still end up unsubscribed in the topic.
+    """
+
+    user_repository: IUserRepository
+    message_broker: IMessageProducer
+    envelope_registry: EventEnvelopeRegistry
+    checkpoint: BackfillCheckpoint
+    created_topics: list[str] = field(default_factory=list)
+    subscribed_topics: list[str] = field(default_factory=list)
+    chunk_size: int = 1000
+    max_users_per_second: float = 2000.0
+
+    async def run(self) -> BackfillCheckpoint:
+        started_at = time.monotonic()
+        users_sent = 0
+
+        while True:
+            cursor = self.checkpoint.cursor
+            users = await self.user_repository.get_page(
+                GetUsersFilters(limit=self.chunk_size, cursor=cursor)
+            )
+            if not users:
+                return self.checkpoint
+
+            messages = self._build_messages(users)
+            await self.message_broker.send_batch(messages)
+
+            corrections = await self._build_corrections(users, cursor)
+            if corrections:
+                await self.message_broker.send_batch(corrections)
+                messages.extend(corrections)
+
+            self.checkpoint.cursor = encode_cursor(users[-1].created_at, users[-1].oid)
+            self.checkpoint.users += len(users)
+            self.checkpoint.messages += len(messages)
+            self.checkpoint.save()
+            logger.info(
+                "Backfilled %s users, %s messages",
+                self.checkpoint.users,
+                self.checkpoint.messages,
+            )
+
+            users_sent += len(users)
+            delay = users_sent / self.max_users_per_second - (
+                time.monotonic() - started_at
+            )
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    def _build_messages(self, users: list[UserEntity]) -> list[BrokerMessage]:
+        messages = []
+        for user in users:
+            events = [
+                (
+                    UserCreatedEvent(
+                        username=user.username.as_generic_type(),
+                        email=user.email.as_generic_type(),
+                        user_timezone=user.user_timezone.as_generic_type(),
+                        user_oid=user.oid,
+                        is_subscribed=user.is_subscribed,
+                    ),
+                    self.created_topics,
+                )
+            ]
+            if user.is_subscribed:
+                events.append(
+                    (
+                        UserSubscribedEvent(
+                            user_oid=user.oid,
+                            username=user.username.as_generic_type(),
+                            email=user.email.as_generic_type(),
+                            user_timezone=user.user_timezone.as_generic_type(),
+                        ),
+                        self.subscribed_topics,
+                    )
+                )
+
+            for event, topics in events:
+                messages.extend(self._encode(event, topics))
+
+        return messages
+
+    async def _build_corrections(
+        self, users: list[UserEntity], cursor: str | None
+    ) -> list[BrokerMessage]:
+        subscribed_users = [user for user in users if user.is_subscribed]
+        if not self.subscribed_topics or not subscribed_users:
+            return []
+
+        # The same chunk again: users created since then sort after it.
+        current_users = await self.user_repository.get_page(
+            GetUsersFilters(limit=self.chunk_size, cursor=cursor)
+        )
+        still_subscribed = {user.oid for user in current_users if user.is_subscribed}
+
+        messages = []
+        for user in subscribed_users:
+            if user.oid in still_subscribed:
+                continue
+
+            event = UserUnsubscribedEvent(
+                user_oid=user.oid,
+                username=user.username.as_generic_type(),
+                email=user.email.as_generic_type(),
+            )
+            messages.extend(self._encode(event, self.subscribed_topics))
+
+        return messages
+
+    def _encode(self, event: BaseEvent, topics: list[str]) -> list[BrokerMessage]:
+        if not topics:
+            return []
+
+        value = self.envelope_registry.encode(event)
+        key = convert_event_to_broker_key(event)
+        return [BrokerMessage(topic=topic, key=key, value=value) for topic in topics]
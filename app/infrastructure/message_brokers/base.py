@@ -1,9 +1,30 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterable
 from dataclasses import dataclass
 
+from infrastructure.tracing.spans import Headers
+
+
+@dataclass(frozen=True)
+class BrokerMessage:
+    topic: str
+    value: bytes
+    key: bytes | None = None
+    headers: Headers = ()
+
+
+@dataclass(frozen=True)
+class ConsumedMessage:
+    topic: str
+    partition: int
+    offset: int
+    value: bytes
+    key: bytes | None = None
+    headers: Headers = ()
+
 
 @dataclass
-class IMessageBroker(ABC):
+class IMessageProducer(ABC):
     @abstractmethod
     async def start(self) -> None: ...
 
@@ -11,10 +32,58 @@ class IMessageBroker(ABC):
     async def stop(self) -> None: ...
 
     @abstractmethod
-    async def send_message(self, key: str, topic: str, value: bytes): ...
+    async def send_message(self, key: bytes, topic: str, value: bytes): ...
+
+    @abstractmethod
+    async def send_batch(self, messages: Iterable[BrokerMessage]) -> None: ...
+
+
+@dataclass
+class IMessageConsumer(ABC):
+    @abstractmethod
+    async def start(self) -> None: ...
+
+    @abstractmethod
+    async def stop(self) -> None: ...
 
     @abstractmethod
     async def start_consuming(self, topic: str): ...
 
+    @abstractmethod
+    def consume_batches(
+        self, topics: Iterable[str], max_records: int
+    ) -> AsyncIterator[list[ConsumedMessage]]:
+        """Subscribe to ``topics`` and yield up to ``max_records`` at a time.
+
+        Every call starts from the last commit, whatever the previous call
+        had already yielded.
+        """
+
+    @abstractmethod
+    def replay(
+        self, topic: str, max_records: int
+    ) -> AsyncIterator[list[ConsumedMessage]]:
+        """Read ``topic`` from its start up to its end at the time of the call.
+
+        Outside of any consumer group: nothing is committed.
+        """
+
+    @abstractmethod
+    async def create_compacted_topic(self, topic: str, partitions: int) -> None:
+        """Create ``topic`` with log compaction unless it already exists."""
+
+    @abstractmethod
+    async def commit(self, messages: Iterable[ConsumedMessage]) -> None:
+        """Mark ``messages`` as processed for the consumer group."""
+
+    @abstractmethod
+    async def get_lag(self) -> dict[str, int]:
+        """Messages not committed yet per topic, for the partitions read here."""
+
     @abstractmethod
     async def stop_consuming(self, topic: str): ...
+
+
+@dataclass
+class IMessageBroker(IMessageProducer, IMessageConsumer):
+    """Both sides of a real broker, e.g. Kafka."""
@@ -0,0 +1,66 @@
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from infrastructure.message_brokers.base import BrokerMessage
+from infrastructure.message_brokers.proxy import MessageProducerProxy
+from infrastructure.tracing.spans import get_trace_headers
+
+
+# Messages held back by the innermost `BatchingMessageBroker.batch()`.
+current_batch: ContextVar[list[BrokerMessage] | None] = ContextVar(
+    "current_batch", default=None
+)
+
+
+@dataclass
+class BatchingMessageBroker(MessageProducerProxy):
+    """Holds back messages sent inside `batch()` and sends them all at once.
+
+    Outside of `batch()` messages go straight to `message_broker`.
+    """
+
+    async def send_message(self, key: bytes, topic: str, value: bytes):
+        await self.send_batch([BrokerMessage(topic=topic, key=key, value=value)])
+
+    async def send_batch(self, messages: Iterable[BrokerMessage]) -> None:
+        batch = current_batch.get()
+        if batch is None:
+            await self.message_broker.send_batch(messages)
+            return
+
+        # The trace context is the sender's, not the one of whoever flushes.
+        trace_headers = get_trace_headers()
+        batch.extend(
+            BrokerMessage(
+                topic=message.topic,
+                key=message.key,
+                value=message.value,
+                headers=message.headers or trace_headers,
+            )
+            for message in messages
+        )
+
+    @asynccontextmanager
+    async def batch(self) -> AsyncIterator[None]:
+        """Collect the messages sent inside the block, tasks spawned from it
+        included, and send them in one `send_batch` on the way out.
+
+        A nested block joins the outer one. Messages are flushed even when
+        the block fails: whatever was sent before the failure would have
+        been delivered without batching too.
+        """
+        if current_batch.get() is not None:
+            yield
+            return
+
+        messages: list[BrokerMessage] = []
+        token = current_batch.set(messages)
+        try:
+            yield
+        finally:
+            current_batch.reset(token)
+            if messages:
+                # Sent in publish order: consumers may rely on it across topics.
+                await self.message_broker.send_batch(messages)
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import aclosing
+from dataclasses import dataclass, field
+
+from infrastructure.exceptions.message_brokers import EventDecodingException
+from infrastructure.message_brokers.base import ConsumedMessage, IMessageBroker
+from infrastructure.message_brokers.converters import (
+    convert_consumed_message_to_dead_letter,
+)
+from infrastructure.metrics.brokers import BrokerMetrics
+from infrastructure.tracing.spans import parse_trace_headers
+from infrastructure.tracing.tracer import Tracer
+
+
+logger = logging.getLogger(__name__)
+
+
+MessageHandler = Callable[[ConsumedMessage], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 3
+    initial_backoff: float = 0.2
+    max_backoff: float = 5.0
+    # Failures that will not go away by trying again.
+    non_retryable: tuple[type[Exception], ...] = (EventDecodingException,)
+
+    def get_backoff(self, attempt: int) -> float:
+        return min(self.initial_backoff * 2 ** (attempt - 1), self.max_backoff)
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        return attempt < self.max_attempts and not isinstance(
+            error, self.non_retryable
+        )
+
+
+@dataclass
+class MessageConsumer:
+    """Feeds every consumed message to `handler`, one at a time.
+
+    A failing message is retried according to `retry_policy` and then
+    published to `dead_letter_topic`, so it never stops the messages behind
+    it. Offsets are committed by hand once a whole batch has been handled or
+    dead-lettered. When `run` fails mid-batch, calling it again starts over
+    from the last commit, so the rest of the batch is redelivered. Commits
+    belong to the broker's consumer group: they only outlive the process if
+    the group id does.
+    After `drain` the message being handled is finished, everything handled
+    so far is committed and `run` returns.
+    """
+
+    message_broker: IMessageBroker
+    topics: list[str]
+    handler: MessageHandler
+    dead_letter_topic: str
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy)
+    max_records: int = 500
+    metrics: BrokerMetrics = field(default_factory=BrokerMetrics)
+    tracer: Tracer = field(default_factory=Tracer)
+    _draining: bool = field(default=False, init=False, repr=False)
+    _handling: bool = field(default=False, init=False, repr=False)
+
+    @property
+    def is_handling(self) -> bool:
+        return self._handling
+
+    def drain(self) -> None:
+        self._draining = True
+
+    async def run(self) -> None:
+        self._draining = False
+        batches = self.message_broker.consume_batches(
+            self.topics, max_records=self.max_records
+        )
+        async with aclosing(batches):
+            async for messages in batches:
+                self._handling = True
+                try:
+                    handled = 0
+                    for message in messages:
+                        if self._draining:
+                            break
+
+                        # Continues the trace of whoever produced the message.
+                        with self.tracer.start_span(
+                            f"consume {message.topic}",
+                            parent=parse_trace_headers(message.headers),
+                            partition=message.partition,
+                            offset=message.offset,
+                        ):
+                            await self._process(message)
+                        handled += 1
+
+                    await self.message_broker.commit(messages[:handled])
+                finally:
+                    self._handling = False
+
+                if self._draining:
+                    return
+
+    async def _process(self, message: ConsumedMessage) -> None:
+        attempt = 1
+        while True:
+            started_at = time.perf_counter()
+            try:
+                await self.handler(message)
+            except Exception as error:
+                self.metrics.record_handled(
+                    message.topic, time.perf_counter() - started_at
+                )
+                if not self.retry_policy.should_retry(error, attempt):
+                    await self._dead_letter(message, error, attempt)
+                    return
+
+                logger.warning(
+                    "Retrying message %s/%s@%s after attempt %s failed: %r",
+                    message.topic,
+                    message.partition,
+                    message.offset,
+                    attempt,
+                    error,
+                )
+                await asyncio.sleep(self.retry_policy.get_backoff(attempt))
+                attempt += 1
+            else:
+                self.metrics.record_handled(
+                    message.topic, time.perf_counter() - started_at
+                )
+                return
+
+    async def _dead_letter(
+        self, message: ConsumedMessage, error: Exception, attempts: int
+    ) -> None:
+        logger.error(
+            "Dead-lettering message %s/%s@%s after %s attempt(s): %r",
+            message.topic,
+            message.partition,
+            message.offset,
+            attempts,
+            error,
+        )
+        dead_letter_message = convert_consumed_message_to_dead_letter(
+            message, error=error, attempts=attempts, topic=self.dead_letter_topic
+        )
+        await self.message_broker.send_batch([dead_letter_message])
+        self.metrics.record_dead_lettered(message.topic)
+
+
+@dataclass
+class ConsumerRunner:
+    """Runs `consumer` in a task of its own and restarts it when it crashes.
+
+    Restarts back off exponentially from `initial_backoff` to `max_backoff`;
+    a consumer that kept running for `max_backoff` starts over from
+    `initial_backoff`. `stop` lets a busy consumer drain for up to
+    `drain_timeout` seconds before cancelling it.
+    """
+
+    consumer: MessageConsumer
+    name: str = "consumer"
+    initial_backoff: float = 1.0
+    max_backoff: float = 30.0
+    drain_timeout: float = 10.0
+    _task: asyncio.Task | None = field(default=None, init=False, repr=False)
+    _stopping: bool = field(default=False, init=False, repr=False)
+
+    async def supervise(self) -> None:
+        failures = 0
+        while True:
+            started_at = time.monotonic()
+            try:
+                await self.consumer.run()
+            except Exception:
+                logger.exception("Consumer %s crashed", self.name)
+
+            if self._stopping:
+                return
+
+            if time.monotonic() - started_at >= self.max_backoff:
+                failures = 0
+            backoff = min(self.initial_backoff * 2**failures, self.max_backoff)
+            failures += 1
+
+            logger.info("Restarting consumer %s in %.1fs", self.name, backoff)
+            await asyncio.sleep(backoff)
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._task = asyncio.create_task(self.supervise(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._stopping = True
+        self.consumer.drain()
+        # An idle consumer is just waiting for messages: nothing to drain.
+        if self.consumer.is_handling:
+            await asyncio.wait({self._task}, timeout=self.drain_timeout)
+
+        if not self._task.done():
+            if self.consumer.is_handling:
+                logger.warning(
+                    "Consumer %s did not drain in %.1fs, cancelling it",
+                    self.name,
+                    self.drain_timeout,
+                )
+            self._task.cancel()
+
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
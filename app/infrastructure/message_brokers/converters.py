@@ -1,14 +1,40 @@
+from base64 import b64encode
 from dataclasses import asdict
 from typing import Any
 
 import orjson
 
 from domain.events.base import BaseEvent
+from infrastructure.message_brokers.base import BrokerMessage, ConsumedMessage
 
 
-def convert_event_to_broker_message(event: BaseEvent) -> bytes:
-    return orjson.dumps(event)
+def convert_event_to_broker_key(event: BaseEvent) -> bytes:
+    # Keying by the aggregate keeps all events of one user on one partition,
+    # and therefore in order.
+    return (getattr(event, "user_oid", None) or event.event_id).encode()
 
 
 def convert_event_to_json(event: BaseEvent) -> dict[str, Any]:
     return asdict(event)
+
+
+def convert_consumed_message_to_dead_letter(
+    message: ConsumedMessage, error: Exception, attempts: int, topic: str
+) -> BrokerMessage:
+    # The original value goes in base64 since a poison message is often not
+    # valid JSON in the first place.
+    return BrokerMessage(
+        topic=topic,
+        key=message.key,
+        headers=message.headers,
+        value=orjson.dumps(
+            {
+                "topic": message.topic,
+                "partition": message.partition,
+                "offset": message.offset,
+                "attempts": attempts,
+                "error": repr(error),
+                "value": b64encode(message.value).decode(),
+            }
+        ),
+    )
@@ -0,0 +1,162 @@
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import Any, TypeVar, get_type_hints
+
+import orjson
+
+from domain.events.base import BaseEvent
+from domain.events.users import (
+    RestoreUserEvent,
+    UserChangedUsernameEvent,
+    UserConfirmedLoginEvent,
+    UserCreatedEvent,
+    UserDeletedEvent,
+    UserSubscribedEvent,
+    UserUnsubscribedEvent,
+)
+from infrastructure.exceptions.message_brokers import EventDecodingException
+
+
+ET = TypeVar("ET", bound=BaseEvent)
+
+# The leading positions of every compact message.
+BASE_EVENT_FIELDS = ("event_id", "occured_at")
+
+
+@dataclass(frozen=True)
+class EventSchema:
+    event_type: type[BaseEvent]
+    name: str
+    type_id: int
+    version: int
+    fields: tuple[str, ...]
+    datetime_fields: frozenset[str]
+
+    def build(self, payload: dict[str, Any]) -> BaseEvent:
+        values = {}
+        for name in self.fields:
+            if name not in payload:
+                continue
+
+            value = payload[name]
+            if name in self.datetime_fields and isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            values[name] = value
+
+        try:
+            return self.event_type(**values)
+        except TypeError as error:
+            raise EventDecodingException(f"{self.name}: {error}") from error
+
+
+@dataclass
+class EventEnvelopeRegistry:
+    """Encodes events into typed, versioned broker messages and back.
+
+    The JSON envelope is ``{"type": name, "version": n, "payload": {...}}``.
+    The compact one is ``[type_id, version, [values...]]`` with the values in
+    dataclass field order, which drops every key from the message. Newer
+    versions of an event may only append fields with defaults, so messages
+    of older versions still decode into the current dataclass; `register`
+    refuses events whose `BaseEvent` fields moved.
+    """
+
+    compact: bool = False
+
+    _by_type: dict[type[BaseEvent], EventSchema] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _by_name: dict[str, EventSchema] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _by_type_id: dict[int, EventSchema] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    def register(
+        self, event_type: type[BaseEvent], name: str, type_id: int, version: int = 1
+    ) -> None:
+        type_hints = get_type_hints(event_type)
+        event_fields = tuple(event_field.name for event_field in fields(event_type))
+        if event_fields[: len(BASE_EVENT_FIELDS)] != BASE_EVENT_FIELDS:
+            raise TypeError(
+                f"{event_type.__name__} must start with {BASE_EVENT_FIELDS} "
+                f"to keep compact messages decodable, got {event_fields}"
+            )
+        schema = EventSchema(
+            event_type=event_type,
+            name=name,
+            type_id=type_id,
+            version=version,
+            fields=event_fields,
+            datetime_fields=frozenset(
+                name for name in event_fields if type_hints.get(name) is datetime
+            ),
+        )
+
+        self._by_type[event_type] = schema
+        self._by_name[name] = schema
+        self._by_type_id[type_id] = schema
+
+    def encode(self, event: BaseEvent) -> bytes:
+        schema = self._by_type[event.__class__]
+
+        if self.compact:
+            values = [getattr(event, name) for name in schema.fields]
+            return orjson.dumps([schema.type_id, schema.version, values])
+
+        return orjson.dumps(
+            {"type": schema.name, "version": schema.version, "payload": event}
+        )
+
+    def decode(self, value: bytes, default_type: type[ET] | None = None) -> ET:
+        """Decode any envelope this registry can produce.
+
+        Messages published before envelopes existed are plain event dicts;
+        they are decoded as ``default_type`` when it is given.
+        """
+        try:
+            document = orjson.loads(value)
+        except orjson.JSONDecodeError as error:
+            raise EventDecodingException("not valid JSON") from error
+
+        match document:
+            case [int(type_id), int(version), list(values)]:
+                schema = self._get_schema(self._by_type_id, type_id)
+                payload = dict(zip(schema.fields, values))
+            case {"type": str(name), "version": int(version), "payload": dict(payload)}:
+                schema = self._get_schema(self._by_name, name)
+            case dict(payload) if default_type is not None:
+                schema = self._get_schema(self._by_type, default_type)
+                version = schema.version
+            case _:
+                raise EventDecodingException("unknown message layout")
+
+        if version > schema.version:
+            raise EventDecodingException(
+                f"{schema.name} version {version} is newer than {schema.version}"
+            )
+
+        return schema.build(payload)
+
+    @staticmethod
+    def _get_schema(schemas: dict[Any, EventSchema], key: Any) -> EventSchema:
+        try:
+            return schemas[key]
+        except KeyError:
+            raise EventDecodingException(f"unknown event type {key}")
+
+
+def create_event_envelope_registry(compact: bool = False) -> EventEnvelopeRegistry:
+    registry = EventEnvelopeRegistry(compact=compact)
+
+    # Type ids travel in compact messages: never reuse or renumber them.
+    registry.register(UserCreatedEvent, name="user_created", type_id=1)
+    registry.register(UserChangedUsernameEvent, name="user_changed_username", type_id=2)
+    registry.register(UserConfirmedLoginEvent, name="user_confirmed_login", type_id=3)
+    registry.register(UserSubscribedEvent, name="user_subscribed", type_id=4)
+    registry.register(UserUnsubscribedEvent, name="user_unsubscribed", type_id=5)
+    registry.register(RestoreUserEvent, name="user_restored", type_id=6)
+    registry.register(UserDeletedEvent, name="user_deleted", type_id=7)
+
+    return registry
@@ -0,0 +1,58 @@
+import time
+from collections.abc import AsyncIterator, Iterable
+from contextlib import aclosing
+from dataclasses import dataclass, field
+
+from infrastructure.message_brokers.base import BrokerMessage, ConsumedMessage
+from infrastructure.message_brokers.proxy import MessageBrokerProxy
+from infrastructure.metrics.brokers import BrokerMetrics
+
+
+@dataclass
+class InstrumentedMessageBroker(MessageBrokerProxy):
+    """Records throughput, batch sizes, send errors and lag into `metrics`."""
+
+    metrics: BrokerMetrics = field(kw_only=True)
+
+    async def send_message(self, key: bytes, topic: str, value: bytes):
+        started_at = time.perf_counter()
+        try:
+            await self.message_broker.send_message(key=key, topic=topic, value=value)
+        except Exception:
+            self.metrics.record_send_error([topic])
+            raise
+
+        self.metrics.record_sent([topic], time.perf_counter() - started_at)
+
+    async def send_batch(self, messages: Iterable[BrokerMessage]) -> None:
+        messages = list(messages)
+        topics = [message.topic for message in messages]
+
+        started_at = time.perf_counter()
+        try:
+            await self.message_broker.send_batch(messages)
+        except Exception:
+            self.metrics.record_send_error(topics)
+            raise
+
+        self.metrics.record_sent(topics, time.perf_counter() - started_at)
+
+    async def start_consuming(self, topic: str) -> AsyncIterator[dict]:
+        async with aclosing(self.message_broker.start_consuming(topic)) as messages:
+            async for message in messages:
+                self.metrics.record_consumed([topic])
+                yield message
+
+    async def consume_batches(
+        self, topics: Iterable[str], max_records: int
+    ) -> AsyncIterator[list[ConsumedMessage]]:
+        batches = self.message_broker.consume_batches(topics, max_records)
+        async with aclosing(batches):
+            async for messages in batches:
+                self.metrics.record_consumed(message.topic for message in messages)
+                yield messages
+
+    async def get_lag(self) -> dict[str, int]:
+        lag = await self.message_broker.get_lag()
+        self.metrics.lag = lag
+        return lag
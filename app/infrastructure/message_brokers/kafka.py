@@ -1,30 +1,191 @@
-from dataclasses import dataclass
+import asyncio
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
 from typing import AsyncIterator
 
 import orjson
 
-from infrastructure.message_brokers.base import IMessageBroker
-from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+from infrastructure.message_brokers.base import (
+    BrokerMessage,
+    ConsumedMessage,
+    IMessageBroker,
+)
+from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, TopicPartition
+from aiokafka.admin import AIOKafkaAdminClient, NewTopic
+from aiokafka.errors import TopicAlreadyExistsError
 
 
 @dataclass
 class KafkaMessageBroker(IMessageBroker):
     producer: AIOKafkaProducer
     consumer: AIOKafkaConsumer
+    bootstrap_servers: str = field(kw_only=True)
+    replication_factor: int = field(default=1, kw_only=True)
 
     async def send_message(self, key: bytes, topic: str, value: bytes):
         await self.producer.send(topic=topic, key=key, value=value)
 
+    async def send_batch(self, messages: Iterable[BrokerMessage]) -> None:
+        # Enqueue everything first so the producer can pack the messages into
+        # as few requests as possible, then wait for all acks at once.
+        delivery_futures = [
+            await self.producer.send(
+                topic=message.topic,
+                key=message.key,
+                value=message.value,
+                headers=list(message.headers) or None,
+            )
+            for message in messages
+        ]
+        await asyncio.gather(*delivery_futures)
+
     async def start_consuming(self, topic: str) -> AsyncIterator[dict]:
         self.consumer.subscribe(topics=[topic])
 
         async for message in self.consumer:
             yield orjson.loads(message.value)
 
+    async def consume_batches(
+        self, topics: Iterable[str], max_records: int
+    ) -> AsyncIterator[list[ConsumedMessage]]:
+        topics = list(topics)
+        if self.consumer.subscription() != set(topics):
+            self.consumer.subscribe(topics=topics)
+        else:
+            # Called again after the previous iteration was abandoned, e.g. by
+            # a crashed consumer: the assignment and the fetch positions
+            # survive, and the positions may be past messages that were never
+            # committed. Go back to the last commit so they are redelivered.
+            for topic_partition in self.consumer.assignment():
+                committed = await self.consumer.committed(topic_partition)
+                if committed is not None:
+                    self.consumer.seek(topic_partition, committed)
+
+        while True:
+            records = await self.consumer.getmany(
+                timeout_ms=1000, max_records=max_records
+            )
+            messages = [
+                ConsumedMessage(
+                    topic=record.topic,
+                    partition=record.partition,
+                    offset=record.offset,
+                    key=record.key,
+                    value=record.value,
+                    headers=tuple(record.headers),
+                )
+                for partition_records in records.values()
+                for record in partition_records
+            ]
+            if messages:
+                yield messages
+
+    async def replay(
+        self, topic: str, max_records: int
+    ) -> AsyncIterator[list[ConsumedMessage]]:
+        # A consumer without a group id, so replays never move any offsets.
+        consumer = AIOKafkaConsumer(
+            bootstrap_servers=self.bootstrap_servers, enable_auto_commit=False
+        )
+        await consumer.start()
+        try:
+            await consumer.topics()
+            partitions = [
+                TopicPartition(topic, partition)
+                for partition in consumer.partitions_for_topic(topic) or ()
+            ]
+            if not partitions:
+                return
+
+            consumer.assign(partitions)
+            end_offsets = await consumer.end_offsets(partitions)
+            await consumer.seek_to_beginning(*partitions)
+
+            remaining = set(partitions)
+            while remaining:
+                # Compaction leaves holes in the offsets, so progress is
+                # measured by position rather than by the last offset seen.
+                for partition in list(remaining):
+                    if await consumer.position(partition) >= end_offsets[partition]:
+                        remaining.discard(partition)
+                if not remaining:
+                    break
+
+                records = await consumer.getmany(
+                    *remaining, timeout_ms=1000, max_records=max_records
+                )
+                messages = [
+                    ConsumedMessage(
+                        topic=record.topic,
+                        partition=record.partition,
+                        offset=record.offset,
+                        key=record.key,
+                        value=record.value,
+                        headers=tuple(record.headers),
+                    )
+                    for partition, partition_records in records.items()
+                    for record in partition_records
+                    if record.offset < end_offsets[partition]
+                ]
+                if messages:
+                    yield messages
+        finally:
+            await consumer.stop()
+
+    async def create_compacted_topic(self, topic: str, partitions: int) -> None:
+        admin_client = AIOKafkaAdminClient(bootstrap_servers=self.bootstrap_servers)
+        await admin_client.start()
+        try:
+            await admin_client.create_topics(
+                [
+                    NewTopic(
+                        name=topic,
+                        num_partitions=partitions,
+                        replication_factor=self.replication_factor,
+                        topic_configs={"cleanup.policy": "compact"},
+                    )
+                ]
+            )
+        except TopicAlreadyExistsError:
+            pass
+        finally:
+            await admin_client.close()
+
+    async def commit(self, messages: Iterable[ConsumedMessage]) -> None:
+        offsets: dict[TopicPartition, int] = {}
+        for message in messages:
+            topic_partition = TopicPartition(message.topic, message.partition)
+            offsets[topic_partition] = max(
+                offsets.get(topic_partition, 0), message.offset + 1
+            )
+
+        if offsets:
+            await self.consumer.commit(offsets)
+
+    async def get_lag(self) -> dict[str, int]:
+        lag: dict[str, int] = defaultdict(int)
+        for topic_partition in self.consumer.assignment():
+            # Only known once the first fetch of the partition came back.
+            highwater = self.consumer.highwater(topic_partition)
+            if highwater is None:
+                continue
+
+            committed = await self.consumer.committed(topic_partition)
+            if committed is None:
+                committed = await self.consumer.position(topic_partition)
+
+            lag[topic_partition.topic] += max(highwater - committed, 0)
+
+        return dict(lag)
+
     async def stop_consuming(self):
         self.consumer.unsubscribe()
 
     async def stop(self):
+        # Deliver whatever is still lingering in the producer's buffers
+        # before the connections go away.
+        await self.producer.flush()
         await self.consumer.stop()
         await self.producer.stop()
 
@@ -0,0 +1,257 @@
+import asyncio
+import itertools
+import zlib
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass, field
+
+import orjson
+
+from infrastructure.message_brokers.base import (
+    BrokerMessage,
+    ConsumedMessage,
+    IMessageBroker,
+)
+
+
+@dataclass
+class InMemoryBrokerLog:
+    """Topics, partitions and group offsets shared by in-memory brokers.
+
+    Messages with a key always go to the same partition, messages without
+    one are spread round-robin, like the Kafka producer does.
+    """
+
+    partitions: int = 4
+
+    _topics: dict[str, list[list[ConsumedMessage]]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    # (group, topic, partition) -> committed offset of the next message
+    _offsets: dict[tuple[str, str, int], int] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    # (group, topic) -> ids of the group members subscribed to the topic
+    _members: dict[tuple[str, str], list[int]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _round_robin: itertools.count = field(
+        default_factory=itertools.count, init=False, repr=False
+    )
+    _appended: asyncio.Event | None = field(default=None, init=False, repr=False)
+
+    def append(self, message: BrokerMessage) -> ConsumedMessage:
+        if message.key is None:
+            partition = next(self._round_robin) % self.partitions
+        else:
+            partition = zlib.crc32(message.key) % self.partitions
+
+        records = self._get_partitions(message.topic)[partition]
+        record = ConsumedMessage(
+            topic=message.topic,
+            partition=partition,
+            offset=len(records),
+            key=message.key,
+            value=message.value,
+            headers=message.headers,
+        )
+        records.append(record)
+
+        if self._appended is not None:
+            self._appended.set()
+            self._appended = None
+
+        return record
+
+    def fetch(
+        self, topic: str, partition: int, offset: int, max_records: int
+    ) -> list[ConsumedMessage]:
+        return self._get_partitions(topic)[partition][offset : offset + max_records]
+
+    def commit(self, group_id: str, topic: str, partition: int, offset: int) -> None:
+        offset_key = (group_id, topic, partition)
+        self._offsets[offset_key] = max(self._offsets.get(offset_key, 0), offset)
+
+    def get_committed(self, group_id: str, topic: str, partition: int) -> int:
+        return self._offsets.get((group_id, topic, partition), 0)
+
+    def join(self, group_id: str, topic: str, member_id: int) -> None:
+        members = self._members.setdefault((group_id, topic), [])
+        if member_id not in members:
+            members.append(member_id)
+
+    def leave(self, group_id: str, topic: str, member_id: int) -> None:
+        members = self._members.get((group_id, topic), [])
+        if member_id in members:
+            members.remove(member_id)
+
+    def get_assignment(self, group_id: str, topic: str, member_id: int) -> list[int]:
+        # Partitions are dealt out to the members of a group like cards, so
+        # every partition is read by exactly one member of each group.
+        members = self._members.get((group_id, topic), [])
+        if member_id not in members:
+            return []
+
+        index = members.index(member_id)
+        return list(range(index, self.partitions, len(members)))
+
+    def get_end_offsets(self, topic: str) -> list[int]:
+        return [len(records) for records in self._get_partitions(topic)]
+
+    def get_lag(self, group_id: str, topic: str) -> int:
+        return sum(
+            len(records) - self._offsets.get((group_id, topic, partition), 0)
+            for partition, records in enumerate(self._get_partitions(topic))
+        )
+
+    async def wait_for_messages(self, timeout: float) -> None:
+        if self._appended is None:
+            self._appended = asyncio.Event()
+
+        try:
+            await asyncio.wait_for(self._appended.wait(), timeout)
+        except TimeoutError:
+            pass
+
+    def _get_partitions(self, topic: str) -> list[list[ConsumedMessage]]:
+        if topic not in self._topics:
+            self._topics[topic] = [[] for _ in range(self.partitions)]
+
+        return self._topics[topic]
+
+
+@dataclass
+class InMemoryMessageBroker(IMessageBroker):
+    """`IMessageBroker` that keeps messages in process memory.
+
+    Brokers sharing one `InMemoryBrokerLog` see each other's messages;
+    brokers with the same `group_id` split the partitions of a topic between
+    them. Like a Kafka consumer without auto-commit, a partition that moves
+    to another member resumes from the last `commit`.
+    """
+
+    log: InMemoryBrokerLog
+    group_id: str
+    poll_timeout: float = 1.0
+    max_records: int = 500
+
+    _subscribed_topics: list[str] = field(default_factory=list, init=False, repr=False)
+    _fetch_round: int = field(default=0, init=False, repr=False)
+    _positions: dict[tuple[str, int], int] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    async def start(self) -> None: ...
+
+    async def stop(self) -> None:
+        await self.stop_consuming()
+
+    async def send_message(self, key: bytes, topic: str, value: bytes):
+        self.log.append(BrokerMessage(topic=topic, key=key, value=value))
+
+    async def send_batch(self, messages: Iterable[BrokerMessage]) -> None:
+        for message in messages:
+            self.log.append(message)
+
+    async def start_consuming(self, topic: str) -> AsyncIterator[dict]:
+        async for messages in self.consume_batches([topic], self.max_records):
+            for message in messages:
+                yield orjson.loads(message.value)
+
+            await self.commit(messages)
+
+    async def consume_batches(
+        self, topics: Iterable[str], max_records: int
+    ) -> AsyncIterator[list[ConsumedMessage]]:
+        # Also forgets the positions, so a new call resumes from the commits.
+        await self.stop_consuming()
+        self._subscribed_topics = list(topics)
+        for topic in self._subscribed_topics:
+            self.log.join(self.group_id, topic, id(self))
+
+        while self._subscribed_topics:
+            messages = self._fetch(max_records)
+            if messages:
+                yield messages
+            else:
+                await self.log.wait_for_messages(self.poll_timeout)
+
+    async def replay(
+        self, topic: str, max_records: int
+    ) -> AsyncIterator[list[ConsumedMessage]]:
+        # Nothing is ever deleted here, so there is nothing to compact either.
+        end_offsets = self.log.get_end_offsets(topic)
+        for partition, end_offset in enumerate(end_offsets):
+            for offset in range(0, end_offset, max_records):
+                yield self.log.fetch(
+                    topic,
+                    partition,
+                    offset,
+                    max_records=min(max_records, end_offset - offset),
+                )
+
+    async def create_compacted_topic(self, topic: str, partitions: int) -> None: ...
+
+    async def commit(self, messages: Iterable[ConsumedMessage]) -> None:
+        for message in messages:
+            self.log.commit(
+                self.group_id, message.topic, message.partition, message.offset + 1
+            )
+
+    async def get_lag(self) -> dict[str, int]:
+        lag: dict[str, int] = {}
+        for topic in self._subscribed_topics:
+            end_offsets = self.log.get_end_offsets(topic)
+            lag[topic] = sum(
+                end_offsets[partition]
+                - self.log.get_committed(self.group_id, topic, partition)
+                for partition in self.log.get_assignment(
+                    self.group_id, topic, id(self)
+                )
+            )
+
+        return lag
+
+    async def stop_consuming(self) -> None:
+        for topic in self._subscribed_topics:
+            self.log.leave(self.group_id, topic, id(self))
+
+        self._subscribed_topics = []
+        self._positions.clear()
+
+    def _fetch(self, max_records: int) -> list[ConsumedMessage]:
+        assignment = [
+            (topic, partition)
+            for topic in self._subscribed_topics
+            for partition in self.log.get_assignment(self.group_id, topic, id(self))
+        ]
+        if not assignment:
+            return []
+
+        # Partitions taken over from another member resume from the last
+        # commit, not from wherever this member left them earlier.
+        self._positions = {
+            topic_partition: position
+            for topic_partition, position in self._positions.items()
+            if topic_partition in assignment
+        }
+
+        # Start from a different partition every time so a busy one cannot
+        # starve the others.
+        self._fetch_round = (self._fetch_round + 1) % len(assignment)
+        assignment = assignment[self._fetch_round :] + assignment[: self._fetch_round]
+
+        messages: list[ConsumedMessage] = []
+        for topic, partition in assignment:
+            position = self._positions.get((topic, partition))
+            if position is None:
+                position = self.log.get_committed(self.group_id, topic, partition)
+
+            records = self.log.fetch(
+                topic, partition, position, max_records=max_records - len(messages)
+            )
+            self._positions[(topic, partition)] = position + len(records)
+            messages.extend(records)
+            if len(messages) >= max_records:
+                break
+
+        return messages
@@ -0,0 +1,37 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from infrastructure.message_brokers.base import BrokerMessage, IMessageProducer
+from infrastructure.repositories.outbox.base import IOutboxRepository, OutboxMessage
+from infrastructure.tracing.spans import get_trace_headers
+
+
+@dataclass
+class OutboxMessageBroker(IMessageProducer):
+    """Producer that writes messages to the transactional outbox.
+
+    Inside a unit of work the rows are committed together with the state
+    change; `OutboxRelay` delivers them to the real broker afterwards.
+    Messages without headers carry the current trace context along.
+    """
+
+    outbox_repository: IOutboxRepository
+
+    async def send_message(self, key: bytes, topic: str, value: bytes):
+        await self.send_batch([BrokerMessage(topic=topic, key=key, value=value)])
+
+    async def send_batch(self, messages: Iterable[BrokerMessage]) -> None:
+        trace_headers = get_trace_headers()
+        await self.outbox_repository.add_many(
+            OutboxMessage(
+                topic=message.topic,
+                key=message.key,
+                value=message.value,
+                headers=message.headers or trace_headers,
+            )
+            for message in messages
+        )
+
+    async def start(self) -> None: ...
+
+    async def stop(self) -> None: ...
@@ -0,0 +1,63 @@
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+
+from infrastructure.message_brokers.base import (
+    BrokerMessage,
+    ConsumedMessage,
+    IMessageBroker,
+    IMessageProducer,
+)
+
+
+@dataclass
+class MessageProducerProxy(IMessageProducer):
+    """Forwards every call to `message_broker`.
+
+    Base for producers that only decorate a few methods of another one.
+    """
+
+    message_broker: IMessageProducer
+
+    async def start(self) -> None:
+        await self.message_broker.start()
+
+    async def stop(self) -> None:
+        await self.message_broker.stop()
+
+    async def send_message(self, key: bytes, topic: str, value: bytes):
+        await self.message_broker.send_message(key=key, topic=topic, value=value)
+
+    async def send_batch(self, messages: Iterable[BrokerMessage]) -> None:
+        await self.message_broker.send_batch(messages)
+
+
+@dataclass
+class MessageBrokerProxy(MessageProducerProxy, IMessageBroker):
+    """`MessageProducerProxy` that forwards the consumer side as well."""
+
+    message_broker: IMessageBroker
+
+    def start_consuming(self, topic: str) -> AsyncIterator[dict]:
+        return self.message_broker.start_consuming(topic)
+
+    def consume_batches(
+        self, topics: Iterable[str], max_records: int
+    ) -> AsyncIterator[list[ConsumedMessage]]:
+        return self.message_broker.consume_batches(topics, max_records)
+
+    def replay(
+        self, topic: str, max_records: int
+    ) -> AsyncIterator[list[ConsumedMessage]]:
+        return self.message_broker.replay(topic, max_records)
+
+    async def create_compacted_topic(self, topic: str, partitions: int) -> None:
+        await self.message_broker.create_compacted_topic(topic, partitions)
+
+    async def commit(self, messages: Iterable[ConsumedMessage]) -> None:
+        await self.message_broker.commit(messages)
+
+    async def get_lag(self) -> dict[str, int]:
+        return await self.message_broker.get_lag()
+
+    async def stop_consuming(self):
+        await self.message_broker.stop_consuming()
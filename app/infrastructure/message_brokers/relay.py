@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from infrastructure.message_brokers.base import BrokerMessage, IMessageProducer
+from infrastructure.repositories.outbox.base import IOutboxLease, IOutboxRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutboxRelay:
+    """Publishes outbox rows to the message broker in id order.
+
+    Only the relay holding the outbox lease publishes, so rows of the same
+    key keep their order however many instances run one; the others stand
+    by and retry for the lease every `poll_interval`.
+
+    A batch is fetched, sent and marked as sent in separate short
+    transactions: nothing stays locked while the broker acknowledges, and a
+    crash between the send and `mark_sent` only causes a redelivery
+    (at-least-once). Rows sent more than `retention` seconds ago are deleted
+    every `cleanup_interval` seconds, `cleanup_batch_size` at a time.
+    """
+
+    outbox_repository: IOutboxRepository
+    message_broker: IMessageProducer
+    batch_size: int = 500
+    poll_interval: float = 0.5
+    retention: float = 86400.0
+    cleanup_interval: float = 60.0
+    cleanup_batch_size: int = 10000
+    _task: asyncio.Task | None = field(default=None, init=False, repr=False)
+
+    async def relay_once(self) -> int:
+        messages = await self.outbox_repository.get_unsent(limit=self.batch_size)
+        if not messages:
+            return 0
+
+        await self.message_broker.send_batch(
+            BrokerMessage(
+                topic=message.topic,
+                key=message.key,
+                value=message.value,
+                headers=message.headers,
+            )
+            for message in messages
+        )
+        await self.outbox_repository.mark_sent(message.id for message in messages)
+
+        return len(messages)
+
+    async def delete_sent(self) -> int:
+        deleted = 0
+        while True:
+            batch_deleted = await self.outbox_repository.delete_sent(
+                older_than=timedelta(seconds=self.retention),
+                limit=self.cleanup_batch_size,
+            )
+            deleted += batch_deleted
+            if batch_deleted < self.cleanup_batch_size:
+                return deleted
+
+    async def run(self) -> None:
+        while True:
+            try:
+                async with self.outbox_repository.acquire_relay_lease() as lease:
+                    if lease is not None:
+                        await self._relay(lease)
+            except Exception:
+                logger.exception("Outbox relay failed, retrying")
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def _relay(self, lease: IOutboxLease) -> None:
+        cleaned_at = 0.0
+        while True:
+            # A relay that lost its lease may already have a successor.
+            await lease.check()
+
+            if time.monotonic() - cleaned_at >= self.cleanup_interval:
+                deleted = await self.delete_sent()
+                if deleted:
+                    logger.info("Deleted %s sent outbox messages", deleted)
+                cleaned_at = time.monotonic()
+
+            relayed = await self.relay_once()
+
+            # Drain without pausing while there is a backlog.
+            if relayed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
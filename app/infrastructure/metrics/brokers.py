@@ -0,0 +1,120 @@
+import time
+from collections import Counter, defaultdict, deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from infrastructure.metrics.latency import LatencyHistogram
+
+
+# Upper bounds in messages per batch.
+DEFAULT_BATCH_SIZE_BUCKETS: tuple[float, ...] = (
+    1,
+    10,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    5000,
+)
+
+
+@dataclass
+class ThroughputMeter:
+    """Total count plus the average rate over the last `window` seconds."""
+
+    window: int = 60
+    total: int = field(default=0, init=False)
+    # [second, count] pairs, oldest first
+    _seconds: deque[list[int]] = field(default_factory=deque, init=False, repr=False)
+
+    def record(self, count: int = 1) -> None:
+        now = int(time.monotonic())
+        if self._seconds and self._seconds[-1][0] == now:
+            self._seconds[-1][1] += count
+        else:
+            self._seconds.append([now, count])
+            self._expire(now)
+
+        self.total += count
+
+    def get_rate(self) -> float:
+        self._expire(int(time.monotonic()))
+        return sum(count for _, count in self._seconds) / self.window
+
+    def _expire(self, now: int) -> None:
+        while self._seconds and self._seconds[0][0] <= now - self.window:
+            self._seconds.popleft()
+
+
+@dataclass
+class TopicMetrics:
+    produced: ThroughputMeter = field(default_factory=ThroughputMeter)
+    consumed: ThroughputMeter = field(default_factory=ThroughputMeter)
+    send_errors: int = 0
+    dead_lettered: int = 0
+    handler_latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "produced": self.produced.total,
+            "produced_per_second": self.produced.get_rate(),
+            "consumed": self.consumed.total,
+            "consumed_per_second": self.consumed.get_rate(),
+            "send_errors": self.send_errors,
+            "dead_lettered": self.dead_lettered,
+            "handler_latency": self.handler_latency.as_dict(),
+        }
+
+
+@dataclass
+class BrokerMetrics:
+    topics: dict[str, TopicMetrics] = field(
+        default_factory=lambda: defaultdict(TopicMetrics)
+    )
+    send_latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    produced_batch_sizes: LatencyHistogram = field(
+        default_factory=lambda: LatencyHistogram(buckets=DEFAULT_BATCH_SIZE_BUCKETS)
+    )
+    consumed_batch_sizes: LatencyHistogram = field(
+        default_factory=lambda: LatencyHistogram(buckets=DEFAULT_BATCH_SIZE_BUCKETS)
+    )
+    # Last known number of uncommitted messages per topic.
+    lag: dict[str, int] = field(default_factory=dict)
+
+    def record_sent(self, topics: Iterable[str], seconds: float) -> None:
+        topic_counts = Counter(topics)
+        for topic, count in topic_counts.items():
+            self.topics[topic].produced.record(count)
+
+        self.produced_batch_sizes.observe(topic_counts.total())
+        self.send_latency.observe(seconds)
+
+    def record_send_error(self, topics: Iterable[str]) -> None:
+        for topic in topics:
+            self.topics[topic].send_errors += 1
+
+    def record_consumed(self, topics: Iterable[str]) -> None:
+        topic_counts = Counter(topics)
+        for topic, count in topic_counts.items():
+            self.topics[topic].consumed.record(count)
+
+        self.consumed_batch_sizes.observe(topic_counts.total())
+
+    def record_handled(self, topic: str, seconds: float) -> None:
+        self.topics[topic].handler_latency.observe(seconds)
+
+    def record_dead_lettered(self, topic: str) -> None:
+        self.topics[topic].dead_lettered += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "topics": {
+                topic: {**self.topics[topic].as_dict(), "lag": self.lag.get(topic)}
+                for topic in sorted(self.topics.keys() | self.lag.keys())
+            },
+            "send_latency": self.send_latency.as_dict(),
+            "produced_batch_sizes": self.produced_batch_sizes.as_dict(),
+            "consumed_batch_sizes": self.consumed_batch_sizes.as_dict(),
+        }
@@ -0,0 +1,85 @@
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+
+# Upper bounds in seconds, the last bucket catches everything slower.
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+@dataclass
+class LatencyHistogram:
+    buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS
+    counts: list[int] = field(init=False)
+    count: int = field(default=0, init=False)
+    total: float = field(default=0.0, init=False)
+    max: float = field(default=0.0, init=False)
+
+    def __post_init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {
+                **{
+                    str(bound): bucket_count
+                    for bound, bucket_count in zip(self.buckets, self.counts)
+                },
+                "+Inf": self.counts[-1],
+            },
+        }
+
+
+@dataclass
+class LatencyRegistry:
+    histograms: dict[str, LatencyHistogram] = field(
+        default_factory=lambda: defaultdict(LatencyHistogram)
+    )
+
+    def observe(self, name: str, seconds: float) -> None:
+        self.histograms[name].observe(seconds)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            name: histogram.as_dict() for name, histogram in self.histograms.items()
+        }
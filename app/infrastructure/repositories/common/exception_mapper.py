@@ -2,9 +2,11 @@ from collections.abc import Callable, Coroutine
 from functools import wraps
 from typing import Any, ParamSpec, TypeVar
 
+from asyncpg import PostgresError, UniqueViolationError
 from sqlalchemy.exc import SQLAlchemyError
 
 from infrastructure.exceptions.base import RepositoryException
+from infrastructure.exceptions.repositories import UniqueViolationException
 
 
 Param = ParamSpec("Param")
@@ -19,7 +21,28 @@ def exception_mapper(
     async def wrapped(*args: Param.args, **kwargs: Param.kwargs) -> ReturnType:
         try:
             return await func(*args, **kwargs)
-        except SQLAlchemyError as err:
+        # PostgresError covers calls made on the raw asyncpg connection.
+        except (SQLAlchemyError, PostgresError) as err:
+            unique_violation = _find_unique_violation(err)
+            if unique_violation is not None:
+                raise UniqueViolationException(
+                    constraint=unique_violation.constraint_name
+                ) from err
+
             raise RepositoryException from err
 
     return wrapped
+
+
+def _find_unique_violation(err: BaseException) -> UniqueViolationError | None:
+    # SQLAlchemy wraps the asyncpg error in its DBAPI adapter's error, which
+    # in turn is wrapped in IntegrityError.
+    seen = set()
+    while err is not None and id(err) not in seen:
+        if isinstance(err, UniqueViolationError):
+            return err
+
+        seen.add(id(err))
+        err = getattr(err, "orig", None) or err.__cause__
+
+    return None
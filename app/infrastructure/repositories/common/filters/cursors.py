@@ -0,0 +1,21 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+
+import orjson
+
+from infrastructure.exceptions.repositories import InvalidCursorException
+
+
+def encode_cursor(created_at: datetime, oid: str) -> str:
+    payload = orjson.dumps([created_at.isoformat(), oid])
+    return urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    padding = "=" * (-len(cursor) % 4)
+    try:
+        created_at, oid = orjson.loads(urlsafe_b64decode(cursor + padding))
+        return datetime.fromisoformat(created_at), str(oid)
+    except (BinasciiError, orjson.JSONDecodeError, TypeError, ValueError):
+        raise InvalidCursorException(cursor)
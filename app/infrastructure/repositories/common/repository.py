@@ -1,4 +1,7 @@
 from abc import ABC
+from collections.abc import AsyncIterator, Awaitable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from typing import Callable
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,6 +10,33 @@ from infrastructure.repositories.common.database import async_session, test_sess
 from settings.settings import Settings
 
 
+# Session of the unit of work running in the current task, if any.
+current_session: ContextVar[AsyncSession | None] = ContextVar(
+    "current_session", default=None
+)
+
+AfterCommitCallback = Callable[[], Awaitable[None]]
+
+# Callbacks the unit of work runs once it has committed; a dict, so a
+# callback registered twice runs once.
+current_after_commit: ContextVar[dict[AfterCommitCallback, None] | None] = ContextVar(
+    "current_after_commit", default=None
+)
+
+
+async def after_commit(callback: AfterCommitCallback) -> None:
+    """Run `callback` once the current unit of work has committed.
+
+    Outside of a unit of work every repository call commits by itself, so
+    the callback runs right away.
+    """
+    callbacks = current_after_commit.get()
+    if callbacks is None:
+        await callback()
+    else:
+        callbacks.setdefault(callback)
+
+
 class ISqlalchemyRepository(ABC):
     _model: type[Base] = NotImplemented
     _session_factory: Callable = async_session
@@ -19,6 +49,18 @@ class ISqlalchemyRepository(ABC):
     def get_session(self) -> AsyncSession:
         return self._session_factory()
 
+    @asynccontextmanager
+    async def session_scope(self) -> AsyncIterator[AsyncSession]:
+        session = current_session.get()
+        if session is not None:
+            # The unit of work owns the transaction and commits it once.
+            yield session
+            return
+
+        async with self.get_session() as session:
+            yield session
+            await session.commit()
+
     @property
     def model_fields(self):
         return self._model.__table__.columns
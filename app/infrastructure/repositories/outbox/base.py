@@ -0,0 +1,48 @@
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass
+from datetime import timedelta
+
+from infrastructure.tracing.spans import Headers
+
+
+@dataclass(frozen=True)
+class OutboxMessage:
+    topic: str
+    value: bytes
+    key: bytes | None = None
+    headers: Headers = ()
+    id: int | None = None
+
+
+class IOutboxLease(ABC):
+    """The exclusive right to relay the outbox, held until released."""
+
+    @abstractmethod
+    async def check(self) -> None:
+        """Raise if the lease was lost, e.g. along with its connection."""
+
+
+class IOutboxRepository(ABC):
+    @abstractmethod
+    async def add_many(self, messages: Iterable[OutboxMessage]) -> None: ...
+
+    @abstractmethod
+    async def get_unsent(self, limit: int) -> list[OutboxMessage]: ...
+
+    @abstractmethod
+    async def mark_sent(self, ids: Iterable[int]) -> None: ...
+
+    @abstractmethod
+    async def delete_sent(self, older_than: timedelta, limit: int) -> int:
+        """Delete up to ``limit`` messages sent more than ``older_than`` ago.
+
+        Returns how many were deleted.
+        """
+
+    @abstractmethod
+    def acquire_relay_lease(
+        self,
+    ) -> AbstractAsyncContextManager[IOutboxLease | None]:
+        """Try to become the one relay; yields ``None`` if another one is."""
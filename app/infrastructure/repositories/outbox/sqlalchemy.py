@@ -0,0 +1,149 @@
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from infrastructure.models.outbox import OutboxMessageModel
+from infrastructure.repositories.common.exception_mapper import exception_mapper
+from infrastructure.repositories.common.repository import ISqlalchemyRepository
+from infrastructure.repositories.outbox.base import (
+    IOutboxLease,
+    IOutboxRepository,
+    OutboxMessage,
+)
+from infrastructure.tracing.spans import Headers
+
+
+# Key of the advisory lock held by the one running relay ("outbox" in ASCII).
+OUTBOX_RELAY_LOCK_ID = 0x6F7574626F78
+
+
+@dataclass(frozen=True)
+class SqlAlchemyOutboxLease(IOutboxLease):
+    connection: AsyncConnection
+
+    async def check(self) -> None:
+        # The lock lives as long as the connection does; a round trip on it
+        # fails once the connection, and with it the lock, is gone.
+        await self.connection.execute(select(1))
+        await self.connection.commit()
+
+
+@dataclass(frozen=True)
+class SqlAlchemyOutboxRepository(IOutboxRepository, ISqlalchemyRepository):
+    _model: type[OutboxMessageModel] = OutboxMessageModel
+
+    @exception_mapper
+    async def add_many(self, messages: Iterable[OutboxMessage]) -> None:
+        # add_all() does no I/O: inside a unit of work the rows are flushed
+        # in one executemany at commit, and concurrent event handlers can
+        # share the session safely.
+        async with self.session_scope() as session:
+            session.add_all(
+                self._model(
+                    topic=message.topic,
+                    key=message.key,
+                    value=message.value,
+                    headers=self._dump_headers(message.headers),
+                )
+                for message in messages
+            )
+
+    @exception_mapper
+    async def get_unsent(self, limit: int) -> list[OutboxMessage]:
+        # No row locks: only the relay holding the lease reads here, and a
+        # lock held while the broker acknowledges would block `mark_sent`
+        # and vacuum for as long as the broker takes.
+        async with self.session_scope() as session:
+            result = await session.execute(
+                select(
+                    self._model.id,
+                    self._model.topic,
+                    self._model.key,
+                    self._model.value,
+                    self._model.headers,
+                )
+                .where(self._model.sent_at.is_(None))
+                .order_by(self._model.id)
+                .limit(limit)
+            )
+
+            return [
+                OutboxMessage(
+                    id=message_id,
+                    topic=topic,
+                    key=key,
+                    value=value,
+                    headers=self._load_headers(headers),
+                )
+                for message_id, topic, key, value, headers in result
+            ]
+
+    @exception_mapper
+    async def mark_sent(self, ids: Iterable[int]) -> None:
+        ids = list(ids)
+        if not ids:
+            return
+
+        async with self.session_scope() as session:
+            await session.execute(
+                update(self._model)
+                .where(self._model.id.in_(ids))
+                .values(sent_at=func.now())
+            )
+
+    @exception_mapper
+    async def delete_sent(self, older_than: timedelta, limit: int) -> int:
+        # Sent rows are the oldest ones, so walking the primary key finds
+        # them without an index on `sent_at`.
+        expired_ids = (
+            select(self._model.id)
+            .where(self._model.sent_at < func.now() - older_than)
+            .order_by(self._model.id)
+            .limit(limit)
+        )
+        async with self.session_scope() as session:
+            result = await session.execute(
+                delete(self._model).where(self._model.id.in_(expired_ids))
+            )
+
+            return result.rowcount
+
+    @asynccontextmanager
+    async def acquire_relay_lease(self) -> AsyncIterator[SqlAlchemyOutboxLease | None]:
+        # A session hands its connection back to the pool on commit, while a
+        # session-level advisory lock belongs to the connection: hold one.
+        engine = self._session_factory.kw["bind"]
+        async with engine.connect() as connection:
+            acquired = await connection.scalar(
+                select(func.pg_try_advisory_lock(OUTBOX_RELAY_LOCK_ID))
+            )
+            await connection.commit()
+            if not acquired:
+                yield None
+                return
+
+            try:
+                yield SqlAlchemyOutboxLease(connection=connection)
+            finally:
+                # The pool would keep the lock along with the connection;
+                # when the unlock fails, the connection is dropped instead.
+                try:
+                    await connection.execute(
+                        select(func.pg_advisory_unlock(OUTBOX_RELAY_LOCK_ID))
+                    )
+                    await connection.commit()
+                except Exception:
+                    await connection.invalidate()
+
+    @staticmethod
+    def _dump_headers(headers: Headers) -> dict[str, str] | None:
+        # Only text headers (trace context) travel through the outbox.
+        return {name: value.decode() for name, value in headers} or None
+
+    @staticmethod
+    def _load_headers(headers: dict[str, str] | None) -> Headers:
+        return tuple((name, value.encode()) for name, value in (headers or {}).items())
@@ -2,22 +2,54 @@ from abc import ABC, abstractmethod
 from typing import Iterable
 
 from domain.entities.users import UserEntity
-from domain.values.users import Username
 from infrastructure.repositories.users.filters.users import GetUsersFilters
 
 
+# Names of the unique constraints on users, as reported by
+# UniqueViolationException.constraint.
+USERS_USERNAME_KEY = "users_username_key"
+USERS_EMAIL_KEY = "users_email_key"
+
+
 class IUserRepository(ABC):
     @abstractmethod
     async def add(self, user: UserEntity) -> None: ...
 
+    @abstractmethod
+    async def add_if_not_exists(self, user: UserEntity) -> str | None:
+        """Insert the user unless a unique column collides.
+
+        Returns the name of the colliding column (``"email"`` or
+        ``"username"``) or ``None`` if the user was inserted. After a
+        collision the current transaction can only be rolled back.
+        """
+
+    @abstractmethod
+    async def add_many_if_not_exists(self, users: list[UserEntity]) -> dict[str, str]:
+        """Bulk version of `add_if_not_exists`.
+
+        Returns the colliding column for every user that was not inserted,
+        keyed by the user's oid. Users must not collide with each other.
+        """
+
     @abstractmethod
     async def get_by_oid(self, oid: str) -> UserEntity | None: ...
 
+    @abstractmethod
+    async def get_many_by_oids(self, oids: Iterable[str]) -> list[UserEntity]:
+        """Fetch every user whose oid is in ``oids`` with a single lookup.
+
+        Missing oids are skipped and the order of the result is unspecified.
+        """
+
     @abstractmethod
     async def get_by_email(self, email: str) -> UserEntity | None: ...
 
     @abstractmethod
-    async def get_existing_usernames(self) -> list[Username]: ...
+    async def get_existing_usernames(self) -> list[str]: ...
+
+    @abstractmethod
+    async def check_username_exists(self, username: str) -> bool: ...
 
     @abstractmethod
     async def get_all_subscribed(self) -> list[UserEntity]: ...
@@ -33,10 +65,30 @@ class IUserRepository(ABC):
     ) -> tuple[Iterable[UserEntity], int]: ...
 
     @abstractmethod
-    async def restore(self, user: UserEntity) -> None: ...
+    async def get_page(self, filters: GetUsersFilters) -> list[UserEntity]:
+        """Like ``get_all`` but without counting the users.
+
+        Meant to walk the whole table page by page with ``filters.cursor``.
+        """
+
+    @abstractmethod
+    async def restore(self, user: UserEntity) -> UserEntity | None: ...
 
     @abstractmethod
-    async def update(self, user: UserEntity) -> UserEntity: ...
+    async def update(self, user: UserEntity) -> UserEntity | None:
+        """Write the fields ``user`` changed; ``None`` if it does not exist.
+
+        ``user`` itself is returned when it has nothing to write.
+        """
 
     @abstractmethod
     async def delete(self, oid: str) -> UserEntity | None: ...
+
+    @abstractmethod
+    async def update_subscriptions(
+        self, oids: Iterable[str], is_subscribed: bool
+    ) -> list[UserEntity]:
+        """Set ``is_subscribed`` for every non-deleted user in ``oids``.
+
+        Returns the users whose subscription actually changed, as updated.
+        """
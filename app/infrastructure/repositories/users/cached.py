@@ -0,0 +1,159 @@
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Iterable
+
+import orjson
+
+from domain.entities.users import UserEntity
+from infrastructure.cache.base import ICache
+from infrastructure.message_brokers.base import BrokerMessage, IMessageProducer
+from infrastructure.repositories.common.repository import (
+    after_commit,
+    current_session,
+)
+from infrastructure.repositories.users.converters import (
+    convert_user_entity_to_values,
+    convert_user_values_to_entity,
+)
+from infrastructure.repositories.users.proxy import UserRepositoryProxy
+
+
+@dataclass
+class CachedUserRepository(UserRepositoryProxy):
+    """Read-through cache for `get_by_oid` in front of another repository.
+
+    Users are cached as plain values and a fresh entity is built on every
+    hit, so callers can mutate what they get without touching the cache.
+    Inside a unit of work the cache is bypassed: reads see the transaction's
+    own writes and a row that may still be rolled back is never cached.
+
+    Writes invalidate both tiers once they are committed. They also send the
+    user's oid to `invalidation_topic` through `invalidation_broker`, an
+    outbox, for `UserCacheInvalidationConsumer` to invalidate the local tier
+    of every other instance; without it that tier is bounded by its TTL.
+
+    Invalidation leaves a tombstone for `tombstone_ttl` seconds rather than
+    deleting: a read that loaded the row before the commit and stores it
+    after the invalidation would otherwise cache the old row for a full
+    TTL. Loaded rows are stored with `add`, which a tombstone blocks.
+    """
+
+    local_cache: ICache = field(kw_only=True)
+    remote_cache: ICache | None = None
+    tombstone_ttl: float = field(default=5.0, kw_only=True)
+    invalidation_broker: IMessageProducer | None = field(default=None, kw_only=True)
+    invalidation_topic: str | None = field(default=None, kw_only=True)
+
+    async def get_by_oid(self, oid: str) -> UserEntity | None:
+        if current_session.get() is not None:
+            return await self.user_repository.get_by_oid(oid=oid)
+
+        values = await self.local_cache.get(oid)
+        if values is not None:
+            return convert_user_values_to_entity(values)
+
+        if self.remote_cache is not None:
+            raw_values = await self.remote_cache.get(oid)
+            if raw_values is not None:
+                values = orjson.loads(raw_values)
+                await self.local_cache.add(oid, values)
+                return convert_user_values_to_entity(values)
+
+        user = await self.user_repository.get_by_oid(oid=oid)
+        if user is not None:
+            await self._store(user)
+
+        return user
+
+    async def get_many_by_oids(self, oids: Iterable[str]) -> list[UserEntity]:
+        if current_session.get() is not None:
+            return await self.user_repository.get_many_by_oids(oids=oids)
+
+        users = []
+        missing_oids = []
+        for oid in dict.fromkeys(oids):
+            values = await self.local_cache.get(oid)
+            if values is None:
+                missing_oids.append(oid)
+            else:
+                users.append(convert_user_values_to_entity(values))
+
+        # The remote tier is skipped here: one round trip per oid would undo
+        # the point of loading them in bulk.
+        if missing_oids:
+            loaded_users = await self.user_repository.get_many_by_oids(
+                oids=missing_oids
+            )
+            for user in loaded_users:
+                await self._store(user)
+            users.extend(loaded_users)
+
+        return users
+
+    async def invalidate(self, oid: str) -> None:
+        await self.local_cache.tombstone(oid, self.tombstone_ttl)
+        if self.remote_cache is not None:
+            await self.remote_cache.tombstone(oid, self.tombstone_ttl)
+
+    async def invalidate_many(self, oids: Iterable[str]) -> None:
+        for oid in oids:
+            await self.invalidate(oid)
+
+    def get_stats(self) -> dict[str, Any]:
+        stats = {"local": self.local_cache.stats.as_dict()}
+        if self.remote_cache is not None:
+            stats["remote"] = self.remote_cache.stats.as_dict()
+
+        return stats
+
+    async def restore(self, user: UserEntity) -> UserEntity | None:
+        restored_user = await self.user_repository.restore(user)
+        await self._invalidate_on_commit([user.oid])
+
+        return restored_user
+
+    async def update(self, user: UserEntity) -> UserEntity | None:
+        updated_user = await self.user_repository.update(user)
+        await self._invalidate_on_commit([user.oid])
+
+        return updated_user
+
+    async def delete(self, oid: str) -> UserEntity | None:
+        deleted_user = await self.user_repository.delete(oid=oid)
+        await self._invalidate_on_commit([oid])
+
+        return deleted_user
+
+    async def update_subscriptions(
+        self, oids: Iterable[str], is_subscribed: bool
+    ) -> list[UserEntity]:
+        updated_users = await self.user_repository.update_subscriptions(
+            oids=oids, is_subscribed=is_subscribed
+        )
+        await self._invalidate_on_commit([user.oid for user in updated_users])
+
+        return updated_users
+
+    async def _invalidate_on_commit(self, oids: list[str]) -> None:
+        if not oids:
+            return
+
+        # Invalidating before the commit would let a concurrent read cache
+        # the old row again right away.
+        await after_commit(partial(self.invalidate_many, oids))
+
+        if self.invalidation_broker is not None:
+            # Written along with the change, so it is relayed once committed.
+            await self.invalidation_broker.send_batch(
+                BrokerMessage(
+                    topic=self.invalidation_topic, key=oid.encode(), value=b""
+                )
+                for oid in oids
+            )
+
+    async def _store(self, user: UserEntity) -> None:
+        values = convert_user_entity_to_values(user)
+        await self.local_cache.add(user.oid, values)
+
+        if self.remote_cache is not None:
+            await self.remote_cache.add(user.oid, orjson.dumps(values))
@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Any
+
 from domain.entities.users import UserEntity
 from domain.values.users import UserEmail, UserTimezone, Username
 from infrastructure.models.users import UserModel
@@ -17,6 +20,20 @@ def convert_user_entity_to_model(user: UserEntity) -> UserModel:
     )
 
 
+def convert_user_entity_to_values(user: UserEntity) -> dict[str, Any]:
+    return {
+        "oid": user.oid,
+        "email": user.email.as_generic_type(),
+        "username": user.username.as_generic_type(),
+        "user_timezone": user.user_timezone.as_generic_type(),
+        "created_at": user.created_at,
+        "updated_at": user.updated_at,
+        "is_deleted": user.is_deleted,
+        "deleted_at": user.deleted_at,
+        "is_subscribed": user.is_subscribed,
+    }
+
+
 def convert_user_model_to_entity(user: UserModel) -> UserEntity:
     return UserEntity(
         oid=user.oid,
@@ -29,3 +46,25 @@ def convert_user_model_to_entity(user: UserModel) -> UserEntity:
         is_deleted=user.is_deleted,
         is_subscribed=user.is_subscribed,
     )
+
+
+def convert_user_values_to_entity(values: dict[str, Any]) -> UserEntity:
+    return UserEntity(
+        oid=values["oid"],
+        email=UserEmail(value=values["email"]),
+        username=Username(value=values["username"]),
+        user_timezone=UserTimezone(value=values["user_timezone"]),
+        created_at=_parse_datetime(values["created_at"]),
+        updated_at=_parse_datetime(values["updated_at"]),
+        deleted_at=_parse_datetime(values["deleted_at"]),
+        is_deleted=values["is_deleted"],
+        is_subscribed=values["is_subscribed"],
+    )
+
+
+def _parse_datetime(value: datetime | str | None) -> datetime | None:
+    # Values that went through JSON (e.g. a Redis cache) come back as strings.
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+
+    return value
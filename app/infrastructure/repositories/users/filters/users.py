@@ -8,3 +8,4 @@ class GetUsersFilters(BaseGetAllFilters):
     limit: int = 10
     offset: int = 0
     show_deleted: bool = False
+    cursor: str | None = None
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from aiokafka import AIOKafkaConsumer
+
+from infrastructure.repositories.users.cached import CachedUserRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UserCacheInvalidationConsumer:
+    """Drops cached users written by any instance, this one included.
+
+    `CachedUserRepository` sends the oid of every user it writes to `topic`,
+    keyed by the oid. The consumer must use a group id unique to this
+    instance so that every instance sees every message. `on_invalidate` is
+    called once per batch of oids, for caches built on top of users.
+    """
+
+    consumer: AIOKafkaConsumer
+    cached_user_repository: CachedUserRepository
+    topic: str
+    on_invalidate: Callable[[set[str]], Awaitable[None]] | None = None
+    max_records: int = 500
+    _task: asyncio.Task | None = field(default=None, init=False, repr=False)
+
+    async def consume(self) -> None:
+        self.consumer.subscribe(topics=[self.topic])
+
+        while True:
+            records = await self.consumer.getmany(
+                timeout_ms=1000, max_records=self.max_records
+            )
+            oids = {
+                record.key.decode()
+                for partition_records in records.values()
+                for record in partition_records
+                if record.key
+            }
+            if not oids:
+                continue
+
+            try:
+                await self.cached_user_repository.invalidate_many(oids)
+                if self.on_invalidate is not None:
+                    await self.on_invalidate(oids)
+            except Exception:
+                # The local tier still expires on its own.
+                logger.exception("Could not invalidate %s cached users", len(oids))
+
+    async def start(self) -> None:
+        await self.consumer.start()
+        self._task = asyncio.create_task(self.consume())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.consumer.stop()
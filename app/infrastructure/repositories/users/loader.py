@@ -0,0 +1,86 @@
+import asyncio
+import contextvars
+from dataclasses import dataclass, field
+
+from domain.entities.users import UserEntity
+from infrastructure.repositories.common.repository import current_session
+from infrastructure.repositories.users.converters import (
+    convert_user_entity_to_values,
+    convert_user_values_to_entity,
+)
+from infrastructure.repositories.users.proxy import UserRepositoryProxy
+
+
+@dataclass
+class BatchingUserRepository(UserRepositoryProxy):
+    """Coalesces concurrent `get_by_oid` calls into `get_many_by_oids`.
+
+    Lookups made within `tick` seconds of each other are answered by a single
+    query, which is flushed early once `max_batch_size` oids are waiting.
+    Lookups inside a unit of work go straight to the wrapped repository so
+    they keep reading from their own transaction.
+    """
+
+    tick: float = field(default=0.002, kw_only=True)
+    max_batch_size: int = field(default=500, kw_only=True)
+
+    _pending: dict[str, list[asyncio.Future]] = field(
+        default_factory=dict, init=False
+    )
+    _flush_handle: asyncio.TimerHandle | None = field(default=None, init=False)
+    _tasks: set[asyncio.Task] = field(default_factory=set, init=False)
+
+    async def get_by_oid(self, oid: str) -> UserEntity | None:
+        if current_session.get() is not None:
+            return await self.user_repository.get_by_oid(oid=oid)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(oid, []).append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.tick, self._dispatch)
+
+        return await future
+
+    def _dispatch(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, {}
+        # Run the batch in an empty context so it never inherits the session
+        # or other context of whichever caller happened to start it.
+        task = asyncio.get_running_loop().create_task(
+            self._load(pending), context=contextvars.Context()
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load(self, pending: dict[str, list[asyncio.Future]]) -> None:
+        try:
+            users = await self.user_repository.get_many_by_oids(oids=list(pending))
+        except Exception as error:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+            return
+
+        users_by_oid = {user.oid: user for user in users}
+        for oid, futures in pending.items():
+            user = users_by_oid.get(oid)
+            for index, future in enumerate(futures):
+                if future.done():
+                    continue
+                # Every caller gets its own entity to mutate.
+                if user is not None and index > 0:
+                    future.set_result(
+                        convert_user_values_to_entity(
+                            convert_user_entity_to_values(user)
+                        )
+                    )
+                else:
+                    future.set_result(user)
@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
 from typing import Iterable
 from domain.entities.users import UserEntity
-from domain.values.users import Username
+from infrastructure.repositories.common.filters.cursors import decode_cursor
 from infrastructure.repositories.users.base import IUserRepository
 from infrastructure.repositories.users.filters.users import GetUsersFilters
 
@@ -13,13 +13,48 @@ class InMemoryUserRepository(IUserRepository):
     async def add(self, user: UserEntity) -> None:
         self._saved_users.append(user)
 
+    async def add_if_not_exists(self, user: UserEntity) -> str | None:
+        for saved_user in self._saved_users:
+            if saved_user.email == user.email:
+                return "email"
+            if saved_user.username == user.username:
+                return "username"
+
+        self._saved_users.append(user)
+
+    async def add_many_if_not_exists(self, users: list[UserEntity]) -> dict[str, str]:
+        conflicts = {}
+        for user in users:
+            conflict = await self.add_if_not_exists(user)
+            if conflict is not None:
+                conflicts[user.oid] = conflict
+
+        return conflicts
+
     async def get_by_oid(self, oid: str) -> UserEntity | None:
         for user in self._saved_users:
             if user.oid == oid:
                 return user
 
-    async def get_existing_usernames(self) -> list[Username]:
-        return [user.username for user in self._saved_users]
+    async def get_many_by_oids(self, oids: Iterable[str]) -> list[UserEntity]:
+        oids = set(oids)
+        return [user for user in self._saved_users if user.oid in oids]
+
+    async def get_by_email(self, email: str) -> UserEntity | None:
+        for user in self._saved_users:
+            if user.email.as_generic_type() == email:
+                return user
+
+    async def get_all_subscribed(self) -> list[UserEntity]:
+        return [user for user in self._saved_users if user.is_subscribed]
+
+    async def get_existing_usernames(self) -> list[str]:
+        return [user.username.as_generic_type() for user in self._saved_users]
+
+    async def check_username_exists(self, username: str) -> bool:
+        return any(
+            user.username.as_generic_type() == username for user in self._saved_users
+        )
 
     async def check_user_exists_by_email_and_username(
         self, email: str, username: str
@@ -33,15 +68,30 @@ class InMemoryUserRepository(IUserRepository):
         self, filters: GetUsersFilters
     ) -> tuple[Iterable[UserEntity], int]:
         total_count = len(self._saved_users)
-        limited_users = self._saved_users[
-            filters.offset : filters.offset + filters.limit
-        ]
+        users = sorted(
+            self._saved_users, key=lambda user: (user.created_at, user.oid)
+        )
+
+        if filters.cursor:
+            cursor = decode_cursor(filters.cursor)
+            users = [user for user in users if (user.created_at, user.oid) > cursor]
+            return users[: filters.limit], total_count
+
+        limited_users = users[filters.offset : filters.offset + filters.limit]
         return limited_users, total_count
 
-    async def update(self, user: UserEntity) -> UserEntity:
+    async def get_page(self, filters: GetUsersFilters) -> list[UserEntity]:
+        users, _ = await self.get_all(filters)
+        return list(users)
+
+    async def restore(self, user: UserEntity) -> UserEntity | None:
+        return await self.update(user)
+
+    async def update(self, user: UserEntity) -> UserEntity | None:
         for i, u in enumerate(self._saved_users):
             if u.oid == user.oid:
                 self._saved_users[i] = user
+                user.clear_changed_fields()
                 return user
 
     async def delete(self, oid: str) -> UserEntity | None:
@@ -49,3 +99,19 @@ class InMemoryUserRepository(IUserRepository):
             if user.oid == oid:
                 self._saved_users.remove(user)
                 return user
+
+    async def update_subscriptions(
+        self, oids: Iterable[str], is_subscribed: bool
+    ) -> list[UserEntity]:
+        oids = set(oids)
+        updated_users = []
+        for user in self._saved_users:
+            if (
+                user.oid in oids
+                and not user.is_deleted
+                and user.is_subscribed != is_subscribed
+            ):
+                user.is_subscribed = is_subscribed
+                updated_users.append(user)
+
+        return updated_users
@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from typing import Iterable
+
+from domain.entities.users import UserEntity
+from infrastructure.repositories.users.base import IUserRepository
+from infrastructure.repositories.users.filters.users import GetUsersFilters
+
+
+@dataclass
+class UserRepositoryProxy(IUserRepository):
+    """Forwards every call to `user_repository`.
+
+    Base for repositories that only decorate a few methods of another one.
+    """
+
+    user_repository: IUserRepository
+
+    async def add(self, user: UserEntity) -> None:
+        await self.user_repository.add(user)
+
+    async def add_if_not_exists(self, user: UserEntity) -> str | None:
+        return await self.user_repository.add_if_not_exists(user)
+
+    async def add_many_if_not_exists(self, users: list[UserEntity]) -> dict[str, str]:
+        return await self.user_repository.add_many_if_not_exists(users)
+
+    async def get_by_oid(self, oid: str) -> UserEntity | None:
+        return await self.user_repository.get_by_oid(oid=oid)
+
+    async def get_many_by_oids(self, oids: Iterable[str]) -> list[UserEntity]:
+        return await self.user_repository.get_many_by_oids(oids=oids)
+
+    async def get_by_email(self, email: str) -> UserEntity | None:
+        return await self.user_repository.get_by_email(email=email)
+
+    async def get_existing_usernames(self) -> list[str]:
+        return await self.user_repository.get_existing_usernames()
+
+    async def check_username_exists(self, username: str) -> bool:
+        return await self.user_repository.check_username_exists(username=username)
+
+    async def get_all_subscribed(self) -> list[UserEntity]:
+        return await self.user_repository.get_all_subscribed()
+
+    async def check_user_exists_by_email_and_username(
+        self, email: str, username: str
+    ) -> bool:
+        return await self.user_repository.check_user_exists_by_email_and_username(
+            email=email, username=username
+        )
+
+    async def get_all(
+        self, filters: GetUsersFilters
+    ) -> tuple[Iterable[UserEntity], int]:
+        return await self.user_repository.get_all(filters=filters)
+
+    async def get_page(self, filters: GetUsersFilters) -> list[UserEntity]:
+        return await self.user_repository.get_page(filters=filters)
+
+    async def restore(self, user: UserEntity) -> UserEntity | None:
+        return await self.user_repository.restore(user)
+
+    async def update(self, user: UserEntity) -> UserEntity | None:
+        return await self.user_repository.update(user)
+
+    async def delete(self, oid: str) -> UserEntity | None:
+        return await self.user_repository.delete(oid=oid)
+
+    async def update_subscriptions(
+        self, oids: Iterable[str], is_subscribed: bool
+    ) -> list[UserEntity]:
+        return await self.user_repository.update_subscriptions(
+            oids=oids, is_subscribed=is_subscribed
+        )
@@ -2,22 +2,45 @@ from dataclasses import dataclass
 from datetime import UTC, datetime
 from typing import Iterable
 
-from sqlalchemy import Select, func, or_, select
+from sqlalchemy import (
+    ARRAY,
+    ColumnElement,
+    Select,
+    String,
+    any_,
+    bindparam,
+    exists,
+    func,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
 
 from domain.entities.users import UserEntity
+from infrastructure.exceptions.repositories import UniqueViolationException
 from infrastructure.repositories.common.exception_mapper import exception_mapper
+from infrastructure.repositories.common.filters.cursors import decode_cursor
 from infrastructure.models.users import UserModel
 from infrastructure.repositories.common.repository import ISqlalchemyRepository
 from infrastructure.repositories.users.base import (
+    USERS_EMAIL_KEY,
+    USERS_USERNAME_KEY,
     IUserRepository,
 )
 from infrastructure.repositories.users.converters import (
     convert_user_entity_to_model,
+    convert_user_entity_to_values,
     convert_user_model_to_entity,
 )
 from infrastructure.repositories.users.filters.users import GetUsersFilters
 
 
+UNIQUE_CONFLICTS = {USERS_EMAIL_KEY: "email", USERS_USERNAME_KEY: "username"}
+
+
 @dataclass(frozen=True)
 class SqlAlchemyUserRepository(IUserRepository, ISqlalchemyRepository):
     _model: type[UserModel] = UserModel
@@ -25,21 +48,108 @@ class SqlAlchemyUserRepository(IUserRepository, ISqlalchemyRepository):
     @exception_mapper
     async def add(self, user: UserEntity) -> None:
         user_model = convert_user_entity_to_model(user)
-        async with self.get_session() as session:
+        async with self.session_scope() as session:
             session.add(user_model)
-            await session.commit()
+
+    async def add_if_not_exists(self, user: UserEntity) -> str | None:
+        # A plain INSERT: the unique violation itself names the constraint
+        # that clashed, so neither path needs a second round trip, and a
+        # violation of any other constraint is not mistaken for a conflict.
+        try:
+            await self._insert(user)
+        except UniqueViolationException as error:
+            conflict = UNIQUE_CONFLICTS.get(error.constraint)
+            if conflict is None:
+                raise
+
+            return conflict
+
+        return None
+
+    @exception_mapper
+    async def _insert(self, user: UserEntity) -> None:
+        # Executed right away, unlike session.add() which waits for a flush.
+        values = convert_user_entity_to_values(user)
+        async with self.session_scope() as session:
+            await session.execute(insert(self._model).values(**values))
+
+    @exception_mapper
+    async def add_many_if_not_exists(self, users: list[UserEntity]) -> dict[str, str]:
+        if not users:
+            return {}
+
+        table = self._model.__tablename__
+        staging_table = f"{table}_import"
+        columns = list(convert_user_entity_to_values(users[0]))
+        column_list = ", ".join(columns)
+        records = [
+            tuple(convert_user_entity_to_values(user).values()) for user in users
+        ]
+
+        async with self.session_scope() as session:
+            # Going through the session first also opens the transaction the
+            # raw COPY below runs in, so the staging table lives until commit.
+            await session.execute(
+                text(
+                    f"CREATE TEMP TABLE IF NOT EXISTS {staging_table} "
+                    f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+            )
+            await session.execute(text(f"TRUNCATE {staging_table}"))
+
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                staging_table, records=records, columns=columns
+            )
+
+            # The outer EXISTS runs on the snapshot taken before the insert,
+            # so it only sees the rows the staged user collided with.
+            result = await session.execute(
+                text(
+                    f"""
+                    WITH inserted AS (
+                        INSERT INTO {table} ({column_list})
+                        SELECT {column_list} FROM {staging_table}
+                        ON CONFLICT DO NOTHING
+                        RETURNING oid
+                    )
+                    SELECT staged.oid,
+                        CASE WHEN EXISTS (
+                            SELECT 1 FROM {table} WHERE email = staged.email
+                        ) THEN 'email' ELSE 'username' END
+                    FROM {staging_table} AS staged
+                    WHERE staged.oid NOT IN (SELECT oid FROM inserted)
+                    """
+                )
+            )
+
+            return {oid: column for oid, column in result}
 
     @exception_mapper
     async def get_by_oid(self, oid: str) -> UserEntity | None:
-        async with self.get_session() as session:
+        async with self.session_scope() as session:
             result = await session.execute(select(self._model).filter_by(oid=oid))
             user = result.scalars().first()
 
             return convert_user_model_to_entity(user) if user else None
 
+    @exception_mapper
+    async def get_many_by_oids(self, oids: Iterable[str]) -> list[UserEntity]:
+        oids = list(oids)
+        if not oids:
+            return []
+
+        async with self.session_scope() as session:
+            result = await session.execute(
+                select(self._model).where(self._match_oids(oids))
+            )
+
+            return [convert_user_model_to_entity(user) for user in result.scalars()]
+
     @exception_mapper
     async def get_by_email(self, email: str) -> UserEntity | None:
-        async with self.get_session() as session:
+        async with self.session_scope() as session:
             result = await session.execute(select(self._model).filter_by(email=email))
             user = result.scalars().first()
 
@@ -49,19 +159,30 @@ class SqlAlchemyUserRepository(IUserRepository, ISqlalchemyRepository):
     async def check_user_exists_by_email_and_username(
         self, email: str, username: str
     ) -> bool:
-        async with self.get_session() as session:
-            result = await session.execute(
-                select(self._model).filter(
-                    or_(self._model.email == email, self._model.username == username)
+        async with self.session_scope() as session:
+            return await session.scalar(
+                select(
+                    exists().where(
+                        or_(
+                            self._model.email == email,
+                            self._model.username == username,
+                        )
+                    )
                 )
             )
-            return result.scalars().first() is not None
+
+    @exception_mapper
+    async def check_username_exists(self, username: str) -> bool:
+        async with self.session_scope() as session:
+            return await session.scalar(
+                select(exists().where(self._model.username == username))
+            )
 
     @exception_mapper
     async def get_all(
         self, filters: GetUsersFilters
     ) -> tuple[Iterable[UserEntity], int]:
-        async with self.get_session() as session:
+        async with self.session_scope() as session:
             get_users_query = await self._build_get_users_query(filters)
             count_users_query = await self._build_count_users_query(filters)
 
@@ -74,9 +195,16 @@ class SqlAlchemyUserRepository(IUserRepository, ISqlalchemyRepository):
             users = [convert_user_model_to_entity(user) for user in users]
             return users, count
 
+    @exception_mapper
+    async def get_page(self, filters: GetUsersFilters) -> list[UserEntity]:
+        async with self.session_scope() as session:
+            result = await session.scalars(await self._build_get_users_query(filters))
+
+            return [convert_user_model_to_entity(user) for user in result]
+
     @exception_mapper
     async def get_all_subscribed(self) -> list[UserEntity]:
-        async with self.get_session() as session:
+        async with self.session_scope() as session:
             result = await session.execute(
                 select(self._model).filter_by(is_subscribed=True)
             )
@@ -86,46 +214,91 @@ class SqlAlchemyUserRepository(IUserRepository, ISqlalchemyRepository):
 
     @exception_mapper
     async def get_existing_usernames(self) -> list[str]:
-        async with self.get_session() as session:
+        async with self.session_scope() as session:
             return await session.scalars(
                 select(self._model.username).where(self._model.username.is_not(None))
             )
 
     @exception_mapper
-    async def update(self, user: UserEntity) -> UserEntity:
-        async with self.get_session() as session:
-            user_model = convert_user_entity_to_model(user)
-            await session.merge(user_model)
-            await session.commit()
+    async def update(self, user: UserEntity) -> UserEntity | None:
+        # Write only what the entity changed, in a single UPDATE ... RETURNING
+        # instead of merge()'s SELECT followed by a full-row UPDATE.
+        changed_fields = user.get_changed_fields()
+        if not changed_fields:
+            return user
+
+        values = convert_user_entity_to_values(user)
+        async with self.session_scope() as session:
+            user_model = await session.scalar(
+                update(self._model)
+                .where(self._model.oid == user.oid)
+                .values({name: values[name] for name in changed_fields})
+                .returning(self._model)
+            )
 
-            return convert_user_model_to_entity(user_model)
+        # Kept until the write succeeded, so a failed one can be retried.
+        user.clear_changed_fields()
+        return convert_user_model_to_entity(user_model) if user_model else None
 
     @exception_mapper
-    async def restore(self, user: UserEntity) -> None:
-        async with self.get_session() as session:
-            user_model = convert_user_entity_to_model(user)
-
-            user_model.is_deleted = False
-            user_model.deleted_at = None
-            await session.merge(user_model)
-            await session.commit()
+    async def restore(self, user: UserEntity) -> UserEntity | None:
+        return await self.update(user)
 
     @exception_mapper
     async def delete(self, oid: str) -> UserEntity | None:
-        async with self.get_session() as session:
-            result = await session.execute(select(self._model).filter_by(oid=oid))
-            user = result.scalars().first()
-            if user:
-                user.is_deleted = True
-                user.deleted_at = datetime.now(UTC)
-                await session.commit()
+        async with self.session_scope() as session:
+            user_model = await session.scalar(
+                update(self._model)
+                .where(self._model.oid == oid)
+                .values(is_deleted=True, deleted_at=datetime.now(UTC))
+                .returning(self._model)
+            )
+
+            return convert_user_model_to_entity(user_model) if user_model else None
+
+    @exception_mapper
+    async def update_subscriptions(
+        self, oids: Iterable[str], is_subscribed: bool
+    ) -> list[UserEntity]:
+        oids = list(oids)
+        if not oids:
+            return []
+
+        # The old state is checked by the UPDATE itself, so a user changed
+        # concurrently is not reported twice.
+        async with self.session_scope() as session:
+            result = await session.scalars(
+                update(self._model)
+                .where(
+                    self._match_oids(oids),
+                    self._model.is_subscribed.is_not(is_subscribed),
+                    self._model.is_deleted.is_(False),
+                )
+                .values(is_subscribed=is_subscribed)
+                .returning(self._model)
+            )
+
+            return [convert_user_model_to_entity(user) for user in result]
 
-                return convert_user_model_to_entity(user)
+    def _match_oids(self, oids: list[str]) -> ColumnElement[bool]:
+        # A single array parameter keeps the statement text identical for
+        # every batch size, unlike an expanding IN list.
+        oids_param = bindparam("oids", value=oids, type_=ARRAY(String))
+        return self._model.oid == any_(oids_param)
 
     async def _build_get_users_query(self, filters: GetUsersFilters) -> Select:
-        query = select(self._model).limit(filters.limit).offset(filters.offset)
+        query = select(self._model).order_by(
+            self._model.created_at, self._model.oid
+        )
         query = await self._apply_filters(query, filters)
 
+        if filters.cursor:
+            query = await self._apply_cursor(query, filters.cursor)
+        else:
+            query = query.offset(filters.offset)
+
+        query = query.limit(filters.limit)
+
         return query
 
     async def _build_count_users_query(self, filters: GetUsersFilters) -> Select:
@@ -139,3 +312,11 @@ class SqlAlchemyUserRepository(IUserRepository, ISqlalchemyRepository):
             query = query.where(self._model.is_deleted == filters.show_deleted)
 
         return query
+
+    async def _apply_cursor(self, query: Select, cursor: str) -> Select:
+        # Keyset pagination over the (created_at, oid) index: the page is found
+        # by an index seek instead of scanning and discarding `offset` rows.
+        created_at, oid = decode_cursor(cursor)
+        return query.where(
+            tuple_(self._model.created_at, self._model.oid) > (created_at, oid)
+        )
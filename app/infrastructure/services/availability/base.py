@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+
+
+class IBloomFilter(ABC):
+    @abstractmethod
+    async def add(self, value: str) -> None: ...
+
+    @abstractmethod
+    async def add_many(self, values: Iterable[str]) -> None: ...
+
+    @abstractmethod
+    async def might_contain(self, value: str) -> bool: ...
+
+    @abstractmethod
+    async def is_populated(self) -> bool:
+        """Whether every existing value was already added, e.g. by another
+        instance sharing the filter."""
+
+    @abstractmethod
+    async def mark_populated(self) -> None: ...
+
+
+class IUserAvailabilityService(ABC):
+    @abstractmethod
+    async def warm_up(self) -> None: ...
+
+    @abstractmethod
+    async def is_username_taken(self, username: str) -> bool: ...
+
+    @abstractmethod
+    async def register(self, username: str) -> None: ...
@@ -0,0 +1,58 @@
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from math import ceil, log
+
+from infrastructure.services.availability.base import IBloomFilter
+
+
+@dataclass
+class BaseBloomFilter(IBloomFilter):
+    capacity: int
+    error_rate: float
+    size: int = field(init=False)
+    hash_count: int = field(init=False)
+
+    def __post_init__(self):
+        self.size = ceil(-self.capacity * log(self.error_rate) / log(2) ** 2)
+        self.hash_count = max(1, round(self.size / self.capacity * log(2)))
+
+    def get_positions(self, value: str) -> list[int]:
+        # Kirsch-Mitzenmacher double hashing: k positions from one digest.
+        digest = blake2b(value.encode(), digest_size=16).digest()
+        first_hash = int.from_bytes(digest[:8], "big")
+        second_hash = int.from_bytes(digest[8:], "big") | 1
+
+        return [
+            (first_hash + i * second_hash) % self.size for i in range(self.hash_count)
+        ]
+
+
+@dataclass
+class InMemoryBloomFilter(BaseBloomFilter):
+    _bits: bytearray = field(init=False, repr=False)
+    _is_populated: bool = field(default=False, init=False, repr=False)
+
+    def __post_init__(self):
+        super().__post_init__()
+        self._bits = bytearray(ceil(self.size / 8))
+
+    async def add(self, value: str) -> None:
+        for position in self.get_positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    async def add_many(self, values: Iterable[str]) -> None:
+        for value in values:
+            await self.add(value)
+
+    async def might_contain(self, value: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self.get_positions(value)
+        )
+
+    async def is_populated(self) -> bool:
+        return self._is_populated
+
+    async def mark_populated(self) -> None:
+        self._is_populated = True
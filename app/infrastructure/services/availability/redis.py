@@ -0,0 +1,68 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from infrastructure.exceptions.availability import BloomFilterUnavailableException
+from infrastructure.services.availability.bloom import BaseBloomFilter
+
+
+@dataclass
+class RedisBloomFilter(BaseBloomFilter):
+    """Bloom filter stored as a plain Redis bitmap, shared by every app
+    instance.
+
+    Uses SETBIT/GETBIT, so no RedisBloom module is required. Redis errors
+    are raised as `BloomFilterUnavailableException`.
+    """
+
+    redis_client: aioredis.Redis
+    key: str
+
+    async def add(self, value: str) -> None:
+        await self.add_many([value])
+
+    async def add_many(self, values: Iterable[str]) -> None:
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for value in values:
+                    for position in self.get_positions(value):
+                        pipe.setbit(self.key, position, 1)
+                await pipe.execute()
+        except RedisError as error:
+            raise BloomFilterUnavailableException(error=error) from error
+
+    async def might_contain(self, value: str) -> bool:
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for position in self.get_positions(value):
+                    pipe.getbit(self.key, position)
+                bits = await pipe.execute()
+        except RedisError as error:
+            raise BloomFilterUnavailableException(error=error) from error
+
+        return all(bits)
+
+    async def is_populated(self) -> bool:
+        try:
+            layout = await self.redis_client.get(self._populated_key)
+        except RedisError as error:
+            raise BloomFilterUnavailableException(error=error) from error
+
+        # Bits set with another size or hash count are at other positions.
+        return layout is not None and layout.decode() == self._layout
+
+    async def mark_populated(self) -> None:
+        try:
+            await self.redis_client.set(self._populated_key, self._layout)
+        except RedisError as error:
+            raise BloomFilterUnavailableException(error=error) from error
+
+    @property
+    def _populated_key(self) -> str:
+        return f"{self.key}:populated"
+
+    @property
+    def _layout(self) -> str:
+        return f"{self.size}:{self.hash_count}"
@@ -0,0 +1,82 @@
+import logging
+from dataclasses import dataclass, field
+
+from infrastructure.exceptions.availability import BloomFilterUnavailableException
+from infrastructure.repositories.users.base import IUserRepository
+from infrastructure.services.availability.base import (
+    IBloomFilter,
+    IUserAvailabilityService,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UserAvailabilityService(IUserAvailabilityService):
+    """Answers whether a username is already in use.
+
+    A negative answer from a warmed-up bloom filter means "definitely
+    free" and skips the database; anything else falls back to an
+    indexed EXISTS query.
+
+    The filter is only an optimisation: when it is unavailable, lookups go
+    to the database and registrations are logged and skipped. A skipped
+    registration stops this instance from trusting the filter; other
+    instances may still answer "free" for that username, and the unique
+    constraint rejects it at write time.
+    """
+
+    user_repository: IUserRepository
+    usernames_filter: IBloomFilter | None = None
+    _is_warmed_up: bool = field(default=False, init=False)
+
+    async def warm_up(self) -> None:
+        if self.usernames_filter is None:
+            return
+
+        try:
+            # A shared filter outlives the process: only the first instance
+            # has to fill it, later ones trust it right away.
+            if not await self.usernames_filter.is_populated():
+                usernames = await self.user_repository.get_existing_usernames()
+                await self.usernames_filter.add_many(usernames)
+                await self.usernames_filter.mark_populated()
+        except BloomFilterUnavailableException:
+            logger.warning(
+                "Username filter warm-up failed, using the database",
+                exc_info=True,
+            )
+            return
+
+        self._is_warmed_up = True
+
+    async def is_username_taken(self, username: str) -> bool:
+        if await self._is_definitely_free(self.usernames_filter, username):
+            return False
+
+        return await self.user_repository.check_username_exists(username=username)
+
+    async def register(self, username: str) -> None:
+        if self.usernames_filter is None:
+            return
+
+        try:
+            await self.usernames_filter.add(username)
+        except BloomFilterUnavailableException:
+            logger.warning(
+                "Username %r was not added to the filter", username, exc_info=True
+            )
+            self._is_warmed_up = False
+
+    async def _is_definitely_free(
+        self, bloom_filter: IBloomFilter | None, value: str
+    ) -> bool:
+        if not self._is_warmed_up or bloom_filter is None:
+            return False
+
+        try:
+            return not await bloom_filter.might_contain(value)
+        except BloomFilterUnavailableException:
+            logger.warning("Username filter lookup failed", exc_info=True)
+            return False
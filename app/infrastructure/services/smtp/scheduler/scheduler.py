@@ -1,16 +1,18 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+import logging
 import smtplib
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.job import Job
 from datetime import datetime
-import orjson
 from pytz import utc
 
 from domain.entities.users import UserEntity
+from domain.events.users import UserSubscribedEvent, UserUnsubscribedEvent
 from domain.values.users import UserEmail, UserTimezone, Username
+from infrastructure.exceptions.message_brokers import EventDecodingException
 from infrastructure.exceptions.senders import (
     SMTPDataError,
     SMTPRecipientsRefused,
@@ -21,7 +23,23 @@ from infrastructure.services.smtp.gmail import GmailSMTPClient
 from infrastructure.services.smtp.mails.base import IMessage
 from infrastructure.services.smtp.mails.reminders import ReminderMessage
 from infrastructure.services.smtp.scheduler.base import IScheduler
-from infrastructure.message_brokers.kafka import KafkaMessageBroker
+from infrastructure.message_brokers.base import ConsumedMessage, IMessageBroker
+from infrastructure.message_brokers.consumers import (
+    ConsumerRunner,
+    MessageConsumer,
+    RetryPolicy,
+)
+from infrastructure.message_brokers.envelopes import EventEnvelopeRegistry
+from infrastructure.metrics.brokers import BrokerMetrics
+from infrastructure.tracing.spans import (
+    Headers,
+    get_trace_headers,
+    parse_trace_headers,
+)
+from infrastructure.tracing.tracer import Tracer
+
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -29,11 +47,26 @@ class EmailScheduler(IScheduler, GmailSMTPClient):
     main_page_url: str
     unsubscribe_url: str
     user_repository: IUserRepository
-    message_broker: KafkaMessageBroker
+    message_broker: IMessageBroker
+    envelope_registry: EventEnvelopeRegistry
     send_time: str
     user_subscribed_event_topic: str
     user_unsubscribed_event_topic: str
     user_jobs: dict[str, str] = None
+    consume_batch_size: int = 500
+    # "database" or "topic", see `start`.
+    bootstrap_mode: str = "database"
+    subscription_state_topic: str = "user_subscription_state"
+    dead_letter_topic: str = "user_events_dead_letter"
+    retry_policy: RetryPolicy = field(default_factory=RetryPolicy)
+    broker_metrics: BrokerMetrics = field(default_factory=BrokerMetrics)
+    consumer_restart_backoff: float = 1.0
+    consumer_restart_max_backoff: float = 30.0
+    consumer_drain_timeout: float = 10.0
+    tracer: Tracer = field(default_factory=Tracer)
+    _consumer_runner: ConsumerRunner | None = field(
+        default=None, init=False, repr=False
+    )
 
     def __post_init__(self):
         self.user_jobs = {}
@@ -53,8 +86,13 @@ class EmailScheduler(IScheduler, GmailSMTPClient):
 
         return msg
 
-    def send_reminder(self, user: UserEntity):
-        with smtplib.SMTP(*self.smtp_url) as server:
+    def send_reminder(self, user: UserEntity, trace_headers: Headers = ()):
+        # Runs in a worker thread, so the trace comes in through the job args.
+        with self.tracer.start_span(
+            "send reminder",
+            parent=parse_trace_headers(trace_headers),
+            user_oid=user.oid,
+        ), smtplib.SMTP(*self.smtp_url) as server:
             server.starttls()
             self.login(server)
 
@@ -74,6 +112,12 @@ class EmailScheduler(IScheduler, GmailSMTPClient):
                 raise SMTPDataError
 
     async def schedule_user_reminders(self, users: list[UserEntity]):
+        with self.tracer.start_span("schedule reminders", users=len(users)):
+            self._schedule_user_reminders(users, trace_headers=get_trace_headers())
+
+    def _schedule_user_reminders(
+        self, users: list[UserEntity], trace_headers: Headers
+    ) -> None:
         for user in users:
             # Validate send time format
             send_time = datetime.strptime(self.send_time, "%H:%M").time()
@@ -87,14 +131,18 @@ class EmailScheduler(IScheduler, GmailSMTPClient):
             # Convert localized send time to UTC
             utc_time = localized_send_time.astimezone(utc)
 
+            # One job per user: a repeated UserSubscribedEvent, e.g. from a
+            # backfill, replaces the job instead of adding a second one.
             job = self.scheduler.add_job(
                 self.send_reminder,
+                id=user.oid,
+                replace_existing=True,
                 trigger=CronTrigger(
                     hour=utc_time.hour,
                     minute=utc_time.minute,
                     timezone=utc,
                 ),
-                args=[user],
+                args=[user, trace_headers],
             )
             self.user_jobs[user.oid] = job.id
 
@@ -109,47 +157,107 @@ class EmailScheduler(IScheduler, GmailSMTPClient):
                 f"Timezone: {job.trigger.timezone}"
             )
 
-    async def _handle_user_subscribed(self, message):
-        user_data = UserEntity(
-            oid=message["user_oid"],
-            email=UserEmail(value=message["email"]),
-            username=Username(value=message["username"]),
-            user_timezone=UserTimezone(value=message["user_timezone"]),
-            is_subscribed=True,
-        )
+    async def _handle_user_subscribed(self, event: UserSubscribedEvent) -> None:
+        user_data = self._convert_event_to_user(event)
         await self.schedule_user_reminders([user_data])
 
-    async def _handle_user_unsubscribed(self, message: dict) -> None:
-        user_oid = message["user_oid"]
+    async def _handle_user_unsubscribed(self, event: UserUnsubscribedEvent) -> None:
+        user_oid = event.user_oid
         if user_oid in self.user_jobs:
             self.scheduler.remove_job(self.user_jobs[user_oid])
             del self.user_jobs[user_oid]
 
-    async def consume_user_event(self) -> None:
-        self.message_broker.consumer.subscribe(
+    async def _load_subscribers_from_topic(self) -> list[UserEntity]:
+        # Only the last event of every user matters, which is exactly what
+        # compaction keeps around.
+        latest_events: dict[str, UserSubscribedEvent | UserUnsubscribedEvent] = {}
+        async for messages in self.message_broker.replay(
+            self.subscription_state_topic, max_records=self.consume_batch_size
+        ):
+            for message in messages:
+                try:
+                    event = self.envelope_registry.decode(message.value)
+                except EventDecodingException as error:
+                    logger.warning(
+                        "Skipping subscription state at %s: %s",
+                        message.offset,
+                        error.message,
+                    )
+                    continue
+
+                latest_events[event.user_oid] = event
+
+        return [
+            self._convert_event_to_user(event)
+            for event in latest_events.values()
+            if isinstance(event, UserSubscribedEvent)
+        ]
+
+    @staticmethod
+    def _convert_event_to_user(event: UserSubscribedEvent) -> UserEntity:
+        return UserEntity(
+            oid=event.user_oid,
+            email=UserEmail(value=event.email),
+            username=Username(value=event.username),
+            user_timezone=UserTimezone(value=event.user_timezone),
+            is_subscribed=True,
+        )
+
+    async def _handle_user_event(self, message: ConsumedMessage) -> None:
+        # Messages from before the envelopes are decoded by their topic.
+        if message.topic == self.user_subscribed_event_topic:
+            default_type = UserSubscribedEvent
+        else:
+            default_type = UserUnsubscribedEvent
+
+        event = self.envelope_registry.decode(message.value, default_type=default_type)
+
+        if isinstance(event, UserSubscribedEvent):
+            await self._handle_user_subscribed(event)
+        elif isinstance(event, UserUnsubscribedEvent):
+            await self._handle_user_unsubscribed(event)
+
+    def build_user_event_consumer(self) -> ConsumerRunner:
+        consumer = MessageConsumer(
+            message_broker=self.message_broker,
+            tracer=self.tracer,
             topics=[
                 self.user_subscribed_event_topic,
                 self.user_unsubscribed_event_topic,
-            ]
+            ],
+            handler=self._handle_user_event,
+            dead_letter_topic=self.dead_letter_topic,
+            retry_policy=self.retry_policy,
+            max_records=self.consume_batch_size,
+            metrics=self.broker_metrics,
+        )
+        return ConsumerRunner(
+            consumer=consumer,
+            name="scheduler-user-events",
+            initial_backoff=self.consumer_restart_backoff,
+            max_backoff=self.consumer_restart_max_backoff,
+            drain_timeout=self.consumer_drain_timeout,
         )
-        async for message in self.message_broker.consumer:
-            topic = message.topic
-            message = orjson.loads(message.value)
-
-            if topic == self.user_subscribed_event_topic:
-                await self._handle_user_subscribed(message)
-            elif topic == self.user_unsubscribed_event_topic:
-                await self._handle_user_unsubscribed(message)
 
     async def start(self):
         # Better typization, DI and __init__ breaks it
         self.scheduler = AsyncIOScheduler()
 
-        users = await self.user_repository.get_all_subscribed()
+        if self.bootstrap_mode == "topic":
+            users = await self._load_subscribers_from_topic()
+        else:
+            users = await self.user_repository.get_all_subscribed()
         await self.schedule_user_reminders(users)
 
         self.scheduler.start()
-        self.scheduler.add_job(self.consume_user_event)
+
+        self._consumer_runner = self.build_user_event_consumer()
+        await self._consumer_runner.start()
 
     async def stop(self):
+        # Drain first: the consumer still schedules and removes jobs.
+        if self._consumer_runner is not None:
+            await self._consumer_runner.stop()
+            self._consumer_runner = None
+
         self.scheduler.shutdown()
@@ -0,0 +1,114 @@
+import logging
+import queue
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+
+import orjson
+
+from infrastructure.tracing.spans import Span
+
+
+logger = logging.getLogger(__name__)
+
+
+class ISpanExporter(ABC):
+    @abstractmethod
+    def export(self, span: Span) -> None: ...
+
+    def shutdown(self) -> None:
+        """Flush whatever `export` has not written out yet."""
+
+
+@dataclass
+class InMemorySpanExporter(ISpanExporter):
+    """Keeps the last `max_spans` finished spans."""
+
+    max_spans: int = 10000
+    spans: deque[Span] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.spans = deque(maxlen=self.max_spans)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def get_trace(self, trace_id: str) -> list[Span]:
+        return sorted(
+            (span for span in self.spans if span.context.trace_id == trace_id),
+            key=lambda span: span.started_at,
+        )
+
+
+@dataclass
+class FileSpanExporter(ISpanExporter):
+    """Appends every finished span to `path` as a line of JSON.
+
+    `export` only queues the span: a background thread serializes whatever
+    is queued and writes it in one go, so neither the event loop nor
+    APScheduler's worker threads wait for the disk. Spans beyond
+    `max_queued_spans` are dropped and counted in `dropped_spans`.
+    """
+
+    path: str
+    max_queued_spans: int = 10000
+    dropped_spans: int = field(default=0, init=False)
+    _queue: queue.Queue[Span | None] = field(init=False, repr=False)
+    _thread: threading.Thread | None = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        self._queue = queue.Queue(maxsize=self.max_queued_spans)
+
+    def export(self, span: Span) -> None:
+        self._start_writer()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped_spans += 1
+
+    def shutdown(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _start_writer(self) -> None:
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._write_spans, name="span-exporter", daemon=True
+                )
+                self._thread.start()
+
+    def _write_spans(self) -> None:
+        while True:
+            spans = [self._queue.get()]
+            while True:
+                try:
+                    spans.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = b"".join(
+                orjson.dumps(span.as_dict(), default=str) + b"\n"
+                for span in spans
+                if span is not None
+            )
+            try:
+                with open(self.path, "ab") as file:
+                    file.write(lines)
+            except OSError:
+                logger.exception("Could not write %s spans", len(spans))
+
+            # `None` is queued by `shutdown`.
+            if None in spans:
+                return
@@ -0,0 +1,85 @@
+import random
+import re
+from collections.abc import Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+
+TRACEPARENT_HEADER = "traceparent"
+
+# W3C trace context: version-trace_id-parent_id-flags
+_TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+# Headers as Kafka has them: (name, value) pairs.
+Headers = tuple[tuple[str, bytes], ...]
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+
+    @classmethod
+    def create(cls, parent: "SpanContext | None" = None) -> "SpanContext":
+        return cls(
+            trace_id=parent.trace_id if parent else f"{random.getrandbits(128):032x}",
+            span_id=f"{random.getrandbits(64):016x}",
+        )
+
+
+@dataclass
+class Span:
+    name: str
+    context: SpanContext
+    parent_id: str | None
+    started_at: float
+    duration: float = 0.0
+    error: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+current_span_context: ContextVar[SpanContext | None] = ContextVar(
+    "current_span_context", default=None
+)
+
+
+def format_traceparent(context: SpanContext) -> str:
+    return f"00-{context.trace_id}-{context.span_id}-01"
+
+
+def parse_traceparent(value: str | None) -> SpanContext | None:
+    match = _TRACEPARENT_PATTERN.match(value or "")
+    if match is None:
+        return None
+
+    return SpanContext(trace_id=match.group(1), span_id=match.group(2))
+
+
+def get_trace_headers() -> Headers:
+    """Headers carrying the current span to whoever reads the message."""
+    context = current_span_context.get()
+    if context is None:
+        return ()
+
+    return ((TRACEPARENT_HEADER, format_traceparent(context).encode()),)
+
+
+def parse_trace_headers(headers: Iterable[tuple[str, bytes]]) -> SpanContext | None:
+    for name, value in headers:
+        if name == TRACEPARENT_HEADER:
+            return parse_traceparent(value.decode(errors="replace"))
+
+    return None
@@ -0,0 +1,48 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from infrastructure.tracing.exporters import ISpanExporter
+from infrastructure.tracing.spans import Span, SpanContext, current_span_context
+
+
+@dataclass
+class Tracer:
+    """Opens spans as children of the current one and hands finished spans
+    to `exporter`.
+
+    Without an exporter spans are not recorded, but the trace context is
+    still propagated.
+    """
+
+    exporter: ISpanExporter | None = None
+
+    @contextmanager
+    def start_span(
+        self, name: str, parent: SpanContext | None = None, **attributes: Any
+    ) -> Iterator[Span]:
+        """Start a span under `parent`, or under the current span if omitted."""
+        if parent is None:
+            parent = current_span_context.get()
+
+        span = Span(
+            name=name,
+            context=SpanContext.create(parent),
+            parent_id=parent.span_id if parent else None,
+            started_at=time.time(),
+            attributes=attributes,
+        )
+        token = current_span_context.set(span.context)
+        started_at = time.perf_counter()
+        try:
+            yield span
+        except BaseException as error:
+            span.error = repr(error)
+            raise
+        finally:
+            span.duration = time.perf_counter() - started_at
+            current_span_context.reset(token)
+            if self.exporter is not None:
+                self.exporter.export(span)
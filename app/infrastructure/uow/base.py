@@ -0,0 +1,7 @@
+from abc import ABC, abstractmethod
+from contextlib import AbstractAsyncContextManager
+
+
+class IUnitOfWork(ABC):
+    @abstractmethod
+    def begin(self) -> AbstractAsyncContextManager[None]: ...
@@ -0,0 +1,59 @@
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure.exceptions.base import RepositoryException
+from infrastructure.repositories.common.database import async_session
+from infrastructure.repositories.common.repository import (
+    AfterCommitCallback,
+    current_after_commit,
+    current_session,
+)
+from infrastructure.uow.base import IUnitOfWork
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SqlAlchemyUnitOfWork(IUnitOfWork):
+    """Shares one session and transaction between every repository call made
+    inside `begin()` and commits it once on exit.
+
+    Nested `begin()` calls join the outer unit of work. Callbacks passed to
+    `after_commit` inside it run once the commit went through.
+    """
+
+    session_factory: Callable[[], AsyncSession] = async_session
+
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator[None]:
+        if current_session.get() is not None:
+            yield
+            return
+
+        callbacks: dict[AfterCommitCallback, None] = {}
+        async with self.session_factory() as session:
+            session_token = current_session.set(session)
+            callbacks_token = current_after_commit.set(callbacks)
+            try:
+                yield
+                await session.commit()
+            except SQLAlchemyError as err:
+                raise RepositoryException from err
+            finally:
+                current_after_commit.reset(callbacks_token)
+                current_session.reset(session_token)
+
+        for callback in callbacks:
+            # The transaction is committed already: a failing callback must
+            # not turn it into an error for the caller.
+            try:
+                await callback()
+            except Exception:
+                logger.exception("After-commit callback %r failed", callback)
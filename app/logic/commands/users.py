@@ -1,16 +1,25 @@
-from dataclasses import dataclass
+from collections.abc import AsyncIterable, Mapping
+from dataclasses import dataclass, field
+
+from pytz import all_timezones_set
 
 from domain.entities.users import UserEntity
+from domain.events.users import UserSubscribedEvent, UserUnsubscribedEvent
+from domain.exceptions.base import ApplicationException
 from domain.values.users import UserEmail, UserTimezone, Username
+from infrastructure.exceptions.repositories import UniqueViolationException
 from infrastructure.repositories.users.base import (
+    USERS_USERNAME_KEY,
     IUserRepository,
 )
+from infrastructure.services.availability.base import IUserAvailabilityService
 from infrastructure.services.otps.base import IOTPService
 from infrastructure.services.smtp.senders.base import ISenderService
 from logic.commands.base import BaseCommand, CommandHandler
 from logic.exceptions.users import (
     IncorrectEmailAddress,
-    UserAlreadyExistsException,
+    InvalidUserTimezoneException,
+    UserEmailAlreadyExistsException,
     UserNotFoundException,
     UsernameAlreadyExistsException,
 )
@@ -37,11 +46,6 @@ class CreateUserCommandHandler(CommandHandler[CreateUserCommand, UserEntity]):
         email = UserEmail(value=command.email)
         user_timezone = UserTimezone(value=command.user_timezone)
 
-        if await self.user_repository.check_user_exists_by_email_and_username(
-            email=email.as_generic_type(), username=username.as_generic_type()
-        ):
-            raise UserAlreadyExistsException()
-
         new_user = await UserEntity.create(
             username=username,
             email=email,
@@ -49,7 +53,13 @@ class CreateUserCommandHandler(CommandHandler[CreateUserCommand, UserEntity]):
             is_subscribed=command.is_subscribed,
         )
 
-        await self.user_repository.add(new_user)
+        conflict = await self.user_repository.add_if_not_exists(new_user)
+
+        if conflict == "email":
+            raise UserEmailAlreadyExistsException(email.as_generic_type())
+        if conflict is not None:
+            raise UsernameAlreadyExistsException(username.as_generic_type())
+
         await self._mediator.publish(new_user.pull_events())
 
         return new_user
@@ -58,6 +68,163 @@ class CreateUserCommandHandler(CommandHandler[CreateUserCommand, UserEntity]):
         return validate_email(email_address=email)
 
 
+def get_mail_domain(email: str) -> str:
+    return email.rpartition("@")[2].lower()
+
+
+@dataclass(frozen=True)
+class UserImportRow:
+    line: int
+    username: str
+    email: str
+    user_timezone: str
+    is_subscribed: bool
+
+
+@dataclass(frozen=True)
+class UserImportRejection:
+    line: int
+    message: str
+
+
+@dataclass
+class UsersImportResult:
+    imported: int = 0
+    rejected: list[UserImportRejection] = field(default_factory=list)
+
+    def reject(self, line: int, error: ApplicationException) -> None:
+        self.rejected.append(UserImportRejection(line=line, message=error.message))
+
+
+@dataclass(frozen=True)
+class ImportUsersCommand(BaseCommand):
+    batches: AsyncIterable[list[UserImportRow]]
+    # Whether each mail domain accepts mail, see `CheckMailDomainsQuery`.
+    domain_verdicts: Mapping[str, bool]
+
+
+@dataclass(frozen=True)
+class ImportUsersCommandHandler(
+    CommandHandler[ImportUsersCommand, UsersImportResult]
+):
+    """Creates users batch by batch and reports every row it rejected.
+
+    Rows are validated in memory, duplicates within the import are rejected
+    up front, rows whose mail domain is not in `domain_verdicts` as valid are
+    rejected, and every batch is stored with one `add_many_if_not_exists`
+    call. The events of each batch are published together.
+
+    The domains are resolved by the caller beforehand: DNS lookups would
+    keep the import's transaction open.
+    """
+
+    user_repository: IUserRepository
+
+    async def handle(self, command: ImportUsersCommand) -> UsersImportResult:
+        result = UsersImportResult()
+        seen_emails: set[str] = set()
+        seen_usernames: set[str] = set()
+
+        async for rows in command.batches:
+            users = await self._build_users(rows, result)
+            users = self._reject_duplicates(
+                users, seen_emails, seen_usernames, result
+            )
+            users = self._reject_undeliverable(users, command.domain_verdicts, result)
+
+            conflicts = await self.user_repository.add_many_if_not_exists(
+                list(users.values())
+            )
+
+            events = []
+            for line, user in users.items():
+                conflict = conflicts.get(user.oid)
+                if conflict is None:
+                    result.imported += 1
+                    events.extend(user.pull_events())
+                    continue
+
+                if conflict == "email":
+                    error = UserEmailAlreadyExistsException(
+                        user.email.as_generic_type()
+                    )
+                else:
+                    error = UsernameAlreadyExistsException(
+                        user.username.as_generic_type()
+                    )
+                result.reject(line, error)
+
+            if events:
+                await self._mediator.publish(events)
+
+        return result
+
+    async def _build_users(
+        self, rows: list[UserImportRow], result: UsersImportResult
+    ) -> dict[int, UserEntity]:
+        users = {}
+        for row in rows:
+            try:
+                if row.user_timezone not in all_timezones_set:
+                    raise InvalidUserTimezoneException(row.user_timezone)
+
+                users[row.line] = await UserEntity.create(
+                    username=Username(value=row.username),
+                    email=UserEmail(value=row.email),
+                    user_timezone=UserTimezone(value=row.user_timezone),
+                    is_subscribed=row.is_subscribed,
+                )
+            except ApplicationException as error:
+                result.reject(row.line, error)
+
+        return users
+
+    def _reject_duplicates(
+        self,
+        users: dict[int, UserEntity],
+        seen_emails: set[str],
+        seen_usernames: set[str],
+        result: UsersImportResult,
+    ) -> dict[int, UserEntity]:
+        # The bulk insert cannot tell two colliding rows of one batch apart,
+        # so only the first occurrence within the import is kept.
+        unique_users = {}
+        for line, user in users.items():
+            email = user.email.as_generic_type()
+            username = user.username.as_generic_type()
+
+            if email in seen_emails:
+                error = UserEmailAlreadyExistsException(email)
+            elif username in seen_usernames:
+                error = UsernameAlreadyExistsException(username)
+            else:
+                seen_emails.add(email)
+                seen_usernames.add(username)
+                unique_users[line] = user
+                continue
+
+            result.reject(line, error)
+
+        return unique_users
+
+    def _reject_undeliverable(
+        self,
+        users: dict[int, UserEntity],
+        domain_verdicts: Mapping[str, bool],
+        result: UsersImportResult,
+    ) -> dict[int, UserEntity]:
+        deliverable_users = {}
+        for line, user in users.items():
+            email = user.email.as_generic_type()
+            if domain_verdicts.get(get_mail_domain(email), False):
+                deliverable_users[line] = user
+                continue
+
+            result.reject(line, IncorrectEmailAddress(email))
+
+        return deliverable_users
+
+
 @dataclass(frozen=True)
 class UserLoginCommand(BaseCommand):
     email: str
@@ -114,6 +281,7 @@ class ChangeUsernameCommand(BaseCommand):
 @dataclass(frozen=True)
 class ChangeUsernameCommandHandler(CommandHandler[ChangeUsernameCommand, None]):
     user_repository: IUserRepository
+    availability_service: IUserAvailabilityService
 
     async def handle(self, command: ChangeUsernameCommand) -> None:
         user = await self.user_repository.get_by_oid(oid=command.user_oid)
@@ -121,14 +289,24 @@ class ChangeUsernameCommandHandler(CommandHandler[ChangeUsernameCommand, None]):
             raise UserNotFoundException(value=command.user_oid)
 
         if command.new_username != user.username.as_generic_type():
-            existing_usernames = await self.user_repository.get_existing_usernames()
-
-            if command.new_username in existing_usernames:
+            if await self.availability_service.is_username_taken(
+                username=command.new_username
+            ):
                 raise UsernameAlreadyExistsException(command.new_username)
 
             new_username = Username(value=command.new_username)
             await user.change_username(new_username=new_username)
-            await self.user_repository.update(user)
+            try:
+                updated_user = await self.user_repository.update(user)
+            except UniqueViolationException as error:
+                # Taken by a concurrent request after the check above.
+                if error.constraint != USERS_USERNAME_KEY:
+                    raise
+                raise UsernameAlreadyExistsException(command.new_username) from error
+
+            if updated_user is None:
+                raise UserNotFoundException(value=command.user_oid)
+
             await self._mediator.publish(user.pull_events())
 
 
@@ -149,7 +327,9 @@ class SubscribeToEmailSenderCommandHandler(
             raise UserNotFoundException(value=command.user_oid)
 
         await user.subscribe_to_email_sender()
-        await self.user_repository.update(user)
+        if await self.user_repository.update(user) is None:
+            # Gone since it was read.
+            raise UserNotFoundException(value=command.user_oid)
         await self._mediator.publish(user.pull_events())
 
 
@@ -170,10 +350,77 @@ class UnsubscribeFromEmailSenderCommandHandler(
             raise UserNotFoundException(value=command.user_oid)
 
         await user.unsubscribe_from_email_sender()
-        await self.user_repository.update(user)
+        if await self.user_repository.update(user) is None:
+            # Gone since it was read.
+            raise UserNotFoundException(value=command.user_oid)
         await self._mediator.publish(user.pull_events())
 
 
+@dataclass(frozen=True)
+class BulkSubscribeToEmailSenderCommand(BaseCommand):
+    user_oids: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class BulkSubscribeToEmailSenderCommandHandler(
+    CommandHandler[BulkSubscribeToEmailSenderCommand, list[str]]
+):
+    user_repository: IUserRepository
+
+    async def handle(self, command: BulkSubscribeToEmailSenderCommand) -> list[str]:
+        # One UPDATE picks the users to change: only those it changed get an
+        # event, built from the row it returned.
+        users = await self.user_repository.update_subscriptions(
+            oids=command.user_oids, is_subscribed=True
+        )
+        if users:
+            await self._mediator.publish(
+                [
+                    UserSubscribedEvent(
+                        user_oid=user.oid,
+                        username=user.username.as_generic_type(),
+                        email=user.email.as_generic_type(),
+                        user_timezone=user.user_timezone.as_generic_type(),
+                    )
+                    for user in users
+                ]
+            )
+
+        return [user.oid for user in users]
+
+
+@dataclass(frozen=True)
+class BulkUnsubscribeFromEmailSenderCommand(BaseCommand):
+    user_oids: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class BulkUnsubscribeFromEmailSenderCommandHandler(
+    CommandHandler[BulkUnsubscribeFromEmailSenderCommand, list[str]]
+):
+    user_repository: IUserRepository
+
+    async def handle(
+        self, command: BulkUnsubscribeFromEmailSenderCommand
+    ) -> list[str]:
+        users = await self.user_repository.update_subscriptions(
+            oids=command.user_oids, is_subscribed=False
+        )
+        if users:
+            await self._mediator.publish(
+                [
+                    UserUnsubscribedEvent(
+                        user_oid=user.oid,
+                        username=user.username.as_generic_type(),
+                        email=user.email.as_generic_type(),
+                    )
+                    for user in users
+                ]
+            )
+
+        return [user.oid for user in users]
+
+
 @dataclass(frozen=True)
 class RestoreUserCommand(BaseCommand):
     user_oid: str
@@ -189,7 +436,9 @@ class RestoreUserCommandHandler(CommandHandler[RestoreUserCommand, None]):
             raise UserNotFoundException(value=command.user_oid)
 
         await user.restore()
-        await self.user_repository.restore(user)
+        if await self.user_repository.restore(user) is None:
+            # Gone since it was read.
+            raise UserNotFoundException(value=command.user_oid)
         await self._mediator.publish(user.pull_events())
 
 
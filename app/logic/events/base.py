@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from typing import Any, Generic, TypeVar
 
 from domain.events.base import BaseEvent
-from infrastructure.message_brokers.base import IMessageBroker
+from infrastructure.message_brokers.base import IMessageProducer
 
 
 ET = TypeVar("ET", bound=BaseEvent)
@@ -12,7 +12,7 @@ ER = TypeVar("ER", bound=Any)
 
 @dataclass
 class EventHandler(ABC, Generic[ET, ER]):
-    message_broker: IMessageBroker
+    message_broker: IMessageProducer
     broker_topic: str | None = None
 
     def handle(self, event: ET) -> ER: ...
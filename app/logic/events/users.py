@@ -1,50 +1,113 @@
-from dataclasses import dataclass
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import partial
 
+from domain.events.base import BaseEvent
 from domain.events.users import (
+    UserChangedUsernameEvent,
     UserCreatedEvent,
     UserDeletedEvent,
     UserSubscribedEvent,
     UserUnsubscribedEvent,
 )
-from infrastructure.message_brokers.converters import convert_event_to_broker_message
+from infrastructure.message_brokers.converters import convert_event_to_broker_key
+from infrastructure.message_brokers.envelopes import EventEnvelopeRegistry
+from infrastructure.repositories.common.repository import after_commit
+from infrastructure.services.availability.base import IUserAvailabilityService
 from logic.events.base import EventHandler
+from logic.queries.cache import QueryResultCache
+from logic.queries.users import GetUserByIdQuery, GetUsersQuery
 
 
 @dataclass
 class NewUserCreatedEventHandler(EventHandler[UserCreatedEvent, None]):
+    envelope_registry: EventEnvelopeRegistry = field(kw_only=True)
+
     async def handle(self, event: UserCreatedEvent) -> None:
         await self.message_broker.send_message(
             topic=self.broker_topic,
-            value=convert_event_to_broker_message(event=event),
-            key=event.event_id.encode(),
+            value=self.envelope_registry.encode(event),
+            key=convert_event_to_broker_key(event),
         )
 
 
 @dataclass
 class UserDeletedEventHandler(EventHandler[UserDeletedEvent, None]):
+    envelope_registry: EventEnvelopeRegistry = field(kw_only=True)
+
     async def handle(self, event: UserDeletedEvent) -> None:
         await self.message_broker.send_message(
             topic=self.broker_topic,
-            value=convert_event_to_broker_message(event=event),
-            key=event.event_id.encode(),
+            value=self.envelope_registry.encode(event),
+            key=convert_event_to_broker_key(event),
         )
 
 
 @dataclass
 class UserSubscribedEventHandler(EventHandler[UserSubscribedEvent, None]):
+    envelope_registry: EventEnvelopeRegistry = field(kw_only=True)
+
     async def handle(self, event: UserSubscribedEvent) -> None:
         await self.message_broker.send_message(
             topic=self.broker_topic,
-            value=convert_event_to_broker_message(event=event),
-            key=event.event_id.encode(),
+            value=self.envelope_registry.encode(event),
+            key=convert_event_to_broker_key(event),
         )
 
 
 @dataclass
 class UserUnsubscribedEventHandler(EventHandler[UserUnsubscribedEvent, None]):
+    envelope_registry: EventEnvelopeRegistry = field(kw_only=True)
+
     async def handle(self, event: UserUnsubscribedEvent) -> None:
         await self.message_broker.send_message(
             topic=self.broker_topic,
-            value=convert_event_to_broker_message(event=event),
-            key=event.event_id.encode(),
+            value=self.envelope_registry.encode(event),
+            key=convert_event_to_broker_key(event),
+        )
+
+
+@dataclass
+class UserCreatedAvailabilityEventHandler(EventHandler[UserCreatedEvent, None]):
+    availability_service: IUserAvailabilityService = field(kw_only=True)
+
+    async def handle(self, event: UserCreatedEvent) -> None:
+        await self.availability_service.register(username=event.username)
+
+
+@dataclass
+class UserChangedUsernameAvailabilityEventHandler(
+    EventHandler[UserChangedUsernameEvent, None]
+):
+    availability_service: IUserAvailabilityService = field(kw_only=True)
+
+    async def handle(self, event: UserChangedUsernameEvent) -> None:
+        await self.availability_service.register(username=event.new_username)
+
+
+@dataclass
+class UserQueryCacheInvalidationEventHandler(EventHandler[BaseEvent, None]):
+    """Drops the cached user queries an event makes stale, once committed.
+
+    However many events a command publishes, the `GetUsersQuery` results
+    are cleared once. `invalidate_users` does the same for the writes of
+    other instances.
+    """
+
+    query_cache: QueryResultCache = field(kw_only=True)
+
+    async def handle(self, event: BaseEvent) -> None:
+        await after_commit(self._invalidate_user_lists)
+        await after_commit(
+            partial(
+                self.query_cache.invalidate, GetUserByIdQuery(user_oid=event.user_oid)
+            )
         )
+
+    async def invalidate_users(self, oids: Iterable[str]) -> None:
+        await self._invalidate_user_lists()
+        for oid in oids:
+            await self.query_cache.invalidate(GetUserByIdQuery(user_oid=oid))
+
+    async def _invalidate_user_lists(self) -> None:
+        await self.query_cache.invalidate_type(GetUsersQuery)
@@ -28,3 +28,12 @@ class QueryHandlersNotRegisteredException(LogicException):
     @property
     def message(self):
         return f"Could not find handlers for the query: {self.query_type}"
+
+
+@dataclass(eq=False)
+class EventHandlersFailedException(LogicException):
+    errors: list[Exception]
+
+    @property
+    def message(self):
+        return f"{len(self.errors)} event handler(s) failed: {self.errors}"
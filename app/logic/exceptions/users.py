@@ -35,6 +35,15 @@ class UsernameAlreadyExistsException(LogicException):
         return f"User with username {self.value} already exists"
 
 
+@dataclass(eq=False)
+class UserEmailAlreadyExistsException(LogicException):
+    value: str
+
+    @property
+    def message(self) -> str:
+        return f"User with email {self.value} already exists"
+
+
 @dataclass(eq=False)
 class IncorrectEmailAddress(LogicException):
     value: str
@@ -42,3 +51,22 @@ class IncorrectEmailAddress(LogicException):
     @property
     def message(self) -> str:
         return f"This email address does not exist {self.value}"
+
+
+@dataclass(eq=False)
+class InvalidUserTimezoneException(LogicException):
+    value: str
+
+    @property
+    def message(self) -> str:
+        return f"Unknown timezone {self.value}"
+
+
+@dataclass(eq=False)
+class InvalidUserImportRowException(LogicException):
+    line: int
+    reason: str
+
+    @property
+    def message(self) -> str:
+        return f"Import row on line {self.line} is malformed: {self.reason}"
@@ -5,11 +5,55 @@ from punq import Container, Scope
 from redis import asyncio as redis
 
 
-from domain.events.users import UserSubscribedEvent, UserUnsubscribedEvent
+from domain.events.users import (
+    RestoreUserEvent,
+    UserChangedUsernameEvent,
+    UserCreatedEvent,
+    UserDeletedEvent,
+    UserSubscribedEvent,
+    UserUnsubscribedEvent,
+)
+from infrastructure.cache.memory import TTLLRUCache
+from infrastructure.cache.redis import RedisCache
 from infrastructure.message_brokers.base import IMessageBroker
+from infrastructure.message_brokers.batching import BatchingMessageBroker
+from infrastructure.message_brokers.consumers import RetryPolicy
+from infrastructure.message_brokers.envelopes import (
+    EventEnvelopeRegistry,
+    create_event_envelope_registry,
+)
+from infrastructure.message_brokers.instrumented import InstrumentedMessageBroker
 from infrastructure.message_brokers.kafka import KafkaMessageBroker
+from infrastructure.message_brokers.memory import (
+    InMemoryBrokerLog,
+    InMemoryMessageBroker,
+)
+from infrastructure.message_brokers.outbox import OutboxMessageBroker
+from infrastructure.message_brokers.relay import OutboxRelay
+from infrastructure.metrics.brokers import BrokerMetrics
+from infrastructure.tracing.exporters import (
+    FileSpanExporter,
+    InMemorySpanExporter,
+    ISpanExporter,
+)
+from infrastructure.tracing.tracer import Tracer
+from infrastructure.repositories.outbox.base import IOutboxRepository
+from infrastructure.repositories.outbox.sqlalchemy import SqlAlchemyOutboxRepository
 from infrastructure.repositories.users.base import IUserRepository
+from infrastructure.repositories.common.database import async_session, test_session
+from infrastructure.repositories.users.cached import CachedUserRepository
+from infrastructure.repositories.users.loader import BatchingUserRepository
+from infrastructure.repositories.users.invalidation import (
+    UserCacheInvalidationConsumer,
+)
 from infrastructure.repositories.users.sqlalchemy import SqlAlchemyUserRepository
+from infrastructure.services.availability.base import (
+    IBloomFilter,
+    IUserAvailabilityService,
+)
+from infrastructure.services.availability.bloom import InMemoryBloomFilter
+from infrastructure.services.availability.redis import RedisBloomFilter
+from infrastructure.services.availability.users import UserAvailabilityService
 from infrastructure.services.smtp.scheduler.base import IScheduler
 from infrastructure.services.smtp.scheduler.scheduler import EmailScheduler
 from infrastructure.services.otps.base import IOTPService
@@ -18,13 +62,21 @@ from infrastructure.services.smtp.senders.base import ISenderService
 from infrastructure.services.smtp.senders.composed import ComposedSenderService
 from infrastructure.services.smtp.senders.dummy import DummySenderService
 from infrastructure.services.smtp.senders.smtp import EmailSenderService
+from infrastructure.uow.base import IUnitOfWork
+from infrastructure.uow.sqlalchemy import SqlAlchemyUnitOfWork
 from logic.commands.users import (
+    BulkSubscribeToEmailSenderCommand,
+    BulkSubscribeToEmailSenderCommandHandler,
+    BulkUnsubscribeFromEmailSenderCommand,
+    BulkUnsubscribeFromEmailSenderCommandHandler,
     ChangeUsernameCommand,
     ChangeUsernameCommandHandler,
     CreateUserCommand,
     CreateUserCommandHandler,
     DeleteUserCommand,
     DeleteUserCommandHandler,
+    ImportUsersCommand,
+    ImportUsersCommandHandler,
     RestoreUserCommand,
     RestoreUserCommandHandler,
     SubscribeToEmailSenderCommand,
@@ -36,11 +88,26 @@ from logic.commands.users import (
     UserLoginCommand,
     UserLoginCommandHandler,
 )
-from logic.events.users import UserSubscribedEventHandler, UserUnsubscribedEventHandler
+from logic.events.users import (
+    UserChangedUsernameAvailabilityEventHandler,
+    UserCreatedAvailabilityEventHandler,
+    UserQueryCacheInvalidationEventHandler,
+    UserSubscribedEventHandler,
+    UserUnsubscribedEventHandler,
+)
 from logic.mediator.base import Mediator
 from logic.mediator.event import EventMediator
+from logic.mediator.middlewares import (
+    LatencyMiddleware,
+    SlowCallLoggingMiddleware,
+    TracingMiddleware,
+)
 
+from logic.queries.cache import QueryCacheMiddleware, QueryResultCache
+from logic.queries.singleflight import SingleFlightMiddleware
 from logic.queries.users import (
+    CheckMailDomainsQuery,
+    CheckMailDomainsQueryHandler,
     GetUserByIdQuery,
     GetUserByIdQueryHandler,
     GetUsersQuery,
@@ -62,7 +129,47 @@ def _init_container() -> Container:
     settings: Settings = container.resolve(Settings)
 
     def init_user_sqlalchemy_repository() -> IUserRepository:
-        return SqlAlchemyUserRepository()
+        user_repository: IUserRepository = SqlAlchemyUserRepository()
+        if settings.USER_LOADER_ENABLED:
+            user_repository = BatchingUserRepository(
+                user_repository=user_repository,
+                tick=settings.USER_LOADER_TICK,
+                max_batch_size=settings.USER_LOADER_MAX_BATCH_SIZE,
+            )
+
+        if not settings.USER_CACHE_ENABLED:
+            return user_repository
+
+        remote_cache = None
+        if settings.USER_CACHE_REDIS_ENABLED:
+            remote_cache = RedisCache(
+                redis_client=redis.Redis(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    db=settings.REDIS_DB,
+                ),
+                ttl=settings.USER_CACHE_REDIS_TTL,
+                prefix="users:",
+            )
+
+        # With Kafka there may be more instances, each with a local tier.
+        invalidation_broker = None
+        if settings.MESSAGE_BROKER_BACKEND == "kafka":
+            invalidation_broker = container.resolve(OutboxMessageBroker)
+
+        return CachedUserRepository(
+            user_repository=user_repository,
+            local_cache=TTLLRUCache(
+                maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL
+            ),
+            remote_cache=remote_cache,
+            tombstone_ttl=settings.USER_CACHE_TOMBSTONE_TTL,
+            invalidation_broker=invalidation_broker,
+            invalidation_topic=settings.user_cache_invalidation_topic,
+        )
+
+    def init_outbox_sqlalchemy_repository() -> IOutboxRepository:
+        return SqlAlchemyOutboxRepository()
 
     def init_redis_otp_service() -> IOTPService:
         return RedisOTPService(
@@ -71,6 +178,33 @@ def _init_container() -> Container:
             )
         )
 
+    def init_availability_filter(key: str) -> IBloomFilter | None:
+        match settings.AVAILABILITY_FILTER_BACKEND:
+            case "memory":
+                return InMemoryBloomFilter(
+                    capacity=settings.AVAILABILITY_FILTER_CAPACITY,
+                    error_rate=settings.AVAILABILITY_FILTER_ERROR_RATE,
+                )
+            case "redis":
+                return RedisBloomFilter(
+                    capacity=settings.AVAILABILITY_FILTER_CAPACITY,
+                    error_rate=settings.AVAILABILITY_FILTER_ERROR_RATE,
+                    redis_client=redis.Redis(
+                        host=settings.REDIS_HOST,
+                        port=settings.REDIS_PORT,
+                        db=settings.REDIS_DB,
+                    ),
+                    key=key,
+                )
+
+        return None
+
+    def init_user_availability_service() -> IUserAvailabilityService:
+        return UserAvailabilityService(
+            user_repository=container.resolve(IUserRepository),
+            usernames_filter=init_availability_filter("availability:usernames"),
+        )
+
     def init_smtplib_sender_service() -> ISenderService:
         return EmailSenderService(
             sender_mail=settings.SENDER_MAIL,
@@ -82,6 +216,7 @@ def _init_container() -> Container:
     def init_email_scheduler() -> EmailScheduler:
         return EmailScheduler(
             message_broker=container.resolve(IMessageBroker),
+            envelope_registry=container.resolve(EventEnvelopeRegistry),
             sender_mail=settings.SENDER_MAIL,
             smtp_app_password=settings.SMTP_APP_PASSWORD,
             smtp_url=settings.SMTP_URL,
@@ -91,6 +226,20 @@ def _init_container() -> Container:
             send_time=settings.SEND_TIME,
             user_subscribed_event_topic=settings.user_subscribed_event_topic,
             user_unsubscribed_event_topic=settings.user_unsubscribed_event_topic,
+            consume_batch_size=settings.MESSAGE_BROKER_CONSUME_BATCH_SIZE,
+            bootstrap_mode=settings.SCHEDULER_BOOTSTRAP_MODE,
+            subscription_state_topic=settings.user_subscription_state_topic,
+            dead_letter_topic=settings.user_events_dead_letter_topic,
+            retry_policy=RetryPolicy(
+                max_attempts=settings.CONSUMER_MAX_ATTEMPTS,
+                initial_backoff=settings.CONSUMER_RETRY_BACKOFF,
+                max_backoff=settings.CONSUMER_RETRY_MAX_BACKOFF,
+            ),
+            broker_metrics=container.resolve(BrokerMetrics),
+            consumer_restart_backoff=settings.CONSUMER_RESTART_BACKOFF,
+            consumer_restart_max_backoff=settings.CONSUMER_RESTART_MAX_BACKOFF,
+            consumer_drain_timeout=settings.CONSUMER_DRAIN_TIMEOUT,
+            tracer=container.resolve(Tracer),
         )
 
     # Services
@@ -106,49 +255,239 @@ def _init_container() -> Container:
         ),
     )
     container.register(IScheduler, factory=init_email_scheduler, scope=Scope.singleton)
+    container.register(
+        IUserAvailabilityService,
+        factory=init_user_availability_service,
+        scope=Scope.singleton,
+    )
 
     # Repositories
     container.register(
         IUserRepository, factory=init_user_sqlalchemy_repository, scope=Scope.singleton
     )
+    container.register(
+        IOutboxRepository,
+        factory=init_outbox_sqlalchemy_repository,
+        scope=Scope.singleton,
+    )
+
+    def init_sqlalchemy_unit_of_work() -> IUnitOfWork:
+        return SqlAlchemyUnitOfWork(
+            session_factory=test_session if settings.TEST_MODE else async_session
+        )
+
+    container.register(
+        IUnitOfWork, factory=init_sqlalchemy_unit_of_work, scope=Scope.singleton
+    )
+
     # Command handlers
     container.register(CreateUserCommandHandler)
+    container.register(ImportUsersCommandHandler)
     container.register(UserLoginCommandHandler)
     container.register(UserConfirmLoginCommandHandler)
     container.register(ChangeUsernameCommandHandler)
     container.register(SubscribeToEmailSenderCommandHandler)
     container.register(UnsubscribeFromEmailSenderCommandHandler)
+    container.register(BulkSubscribeToEmailSenderCommandHandler)
+    container.register(BulkUnsubscribeFromEmailSenderCommandHandler)
     container.register(RestoreUserCommandHandler)
     container.register(DeleteUserCommandHandler)
 
     # Query Handlers
     container.register(GetUsersQueryHandler)
     container.register(GetUserByIdQueryHandler)
+    container.register(CheckMailDomainsQueryHandler)
 
     # Message broker
+    container.register(
+        EventEnvelopeRegistry,
+        instance=create_event_envelope_registry(
+            compact=settings.EVENT_ENCODING == "compact"
+        ),
+        scope=Scope.singleton,
+    )
+
+    container.register(BrokerMetrics, instance=BrokerMetrics(), scope=Scope.singleton)
+
     def create_message_broker() -> IMessageBroker:
+        return InstrumentedMessageBroker(
+            message_broker=create_backend_message_broker(),
+            metrics=container.resolve(BrokerMetrics),
+        )
+
+    def create_backend_message_broker() -> IMessageBroker:
+        if settings.MESSAGE_BROKER_BACKEND == "memory":
+            return InMemoryMessageBroker(
+                log=InMemoryBrokerLog(
+                    partitions=settings.MESSAGE_BROKER_MEMORY_PARTITIONS
+                ),
+                group_id=f"{uuid4()}",
+                max_records=settings.MESSAGE_BROKER_CONSUME_BATCH_SIZE,
+            )
+
         return KafkaMessageBroker(
-            producer=AIOKafkaProducer(bootstrap_servers=settings.KAFKA_URL),
+            producer=AIOKafkaProducer(
+                bootstrap_servers=settings.KAFKA_URL,
+                **settings.KAFKA_PRODUCER_OPTIONS,
+            ),
             consumer=AIOKafkaConsumer(
                 bootstrap_servers=settings.KAFKA_URL,
+                # A group per process: every scheduler sees every user event.
+                # Commits therefore do not survive a restart; the scheduler
+                # rebuilds its jobs from the database or the state topic.
                 group_id=f"{uuid4()}",
                 metadata_max_age_ms=30000,
+                # Offsets are committed by `commit` once messages are handled.
+                enable_auto_commit=False,
             ),
+            bootstrap_servers=settings.KAFKA_URL,
+            replication_factor=settings.KAFKA_REPLICATION_FACTOR,
         )
 
     container.register(
         IMessageBroker, factory=create_message_broker, scope=Scope.singleton
     )
 
+    def init_user_cache_invalidation_consumer() -> UserCacheInvalidationConsumer:
+        # Query results are built from users, so they go stale with them.
+        on_invalidate = None
+        if settings.QUERY_CACHE_ENABLED:
+            on_invalidate = container.resolve(
+                UserQueryCacheInvalidationEventHandler
+            ).invalidate_users
+
+        return UserCacheInvalidationConsumer(
+            consumer=AIOKafkaConsumer(
+                bootstrap_servers=settings.KAFKA_URL,
+                group_id=f"user-cache-{uuid4()}",
+                metadata_max_age_ms=30000,
+            ),
+            cached_user_repository=container.resolve(IUserRepository),
+            topic=settings.user_cache_invalidation_topic,
+            on_invalidate=on_invalidate,
+        )
+
+    container.register(
+        UserCacheInvalidationConsumer,
+        factory=init_user_cache_invalidation_consumer,
+        scope=Scope.singleton,
+    )
+
+    # Transactional outbox
+    def init_outbox_message_broker() -> OutboxMessageBroker:
+        return OutboxMessageBroker(
+            outbox_repository=container.resolve(IOutboxRepository),
+        )
+
+    def init_outbox_relay() -> OutboxRelay:
+        return OutboxRelay(
+            outbox_repository=container.resolve(IOutboxRepository),
+            message_broker=container.resolve(IMessageBroker),
+            batch_size=settings.OUTBOX_RELAY_BATCH_SIZE,
+            poll_interval=settings.OUTBOX_RELAY_POLL_INTERVAL,
+            retention=settings.OUTBOX_SENT_RETENTION,
+            cleanup_interval=settings.OUTBOX_CLEANUP_INTERVAL,
+            cleanup_batch_size=settings.OUTBOX_CLEANUP_BATCH_SIZE,
+        )
+
+    container.register(
+        OutboxMessageBroker, factory=init_outbox_message_broker, scope=Scope.singleton
+    )
+    container.register(OutboxRelay, factory=init_outbox_relay, scope=Scope.singleton)
+
+    def init_batching_message_broker() -> BatchingMessageBroker:
+        return BatchingMessageBroker(
+            message_broker=container.resolve(OutboxMessageBroker),
+        )
+
+    container.register(
+        BatchingMessageBroker,
+        factory=init_batching_message_broker,
+        scope=Scope.singleton,
+    )
+
+    # Tracing
+    def init_span_exporter() -> ISpanExporter | None:
+        if settings.TRACING_EXPORTER == "memory":
+            return InMemorySpanExporter(max_spans=settings.TRACING_MEMORY_MAX_SPANS)
+        if settings.TRACING_EXPORTER == "file":
+            return FileSpanExporter(
+                path=settings.TRACING_FILE_PATH,
+                max_queued_spans=settings.TRACING_FILE_MAX_QUEUED_SPANS,
+            )
+
+        return None
+
+    container.register(
+        Tracer, instance=Tracer(exporter=init_span_exporter()), scope=Scope.singleton
+    )
+
     # Mediator
+    container.register(
+        LatencyMiddleware, instance=LatencyMiddleware(), scope=Scope.singleton
+    )
+    container.register(
+        SingleFlightMiddleware,
+        instance=SingleFlightMiddleware(),
+        scope=Scope.singleton,
+    )
+    container.register(
+        QueryResultCache,
+        instance=QueryResultCache(
+            query_types=[GetUsersQuery, GetUserByIdQuery],
+            maxsize=settings.QUERY_CACHE_SIZE,
+            ttl=settings.QUERY_CACHE_TTL,
+        ),
+        scope=Scope.singleton,
+    )
+
+    def init_user_query_cache_invalidation_handler() -> (
+        UserQueryCacheInvalidationEventHandler
+    ):
+        return UserQueryCacheInvalidationEventHandler(
+            message_broker=container.resolve(IMessageBroker),
+            query_cache=container.resolve(QueryResultCache),
+        )
+
+    container.register(
+        UserQueryCacheInvalidationEventHandler,
+        factory=init_user_query_cache_invalidation_handler,
+        scope=Scope.singleton,
+    )
+
     def init_mediator() -> Mediator:
-        mediator = Mediator()
+        mediator = Mediator(
+            unit_of_work=container.resolve(IUnitOfWork),
+            concurrent_publish=settings.MEDIATOR_CONCURRENT_PUBLISH,
+            message_broker=(
+                container.resolve(BatchingMessageBroker)
+                if settings.MEDIATOR_BATCH_PUBLISH
+                else None
+            ),
+            tracer=container.resolve(Tracer),
+        )
+        mediator.add_middleware(TracingMiddleware(tracer=container.resolve(Tracer)))
+        mediator.add_middleware(container.resolve(LatencyMiddleware))
+        mediator.add_middleware(
+            SlowCallLoggingMiddleware(
+                threshold=settings.MEDIATOR_SLOW_CALL_THRESHOLD
+            )
+        )
+        if settings.QUERY_CACHE_ENABLED:
+            mediator.add_middleware(
+                QueryCacheMiddleware(cache=container.resolve(QueryResultCache))
+            )
+        mediator.add_middleware(container.resolve(SingleFlightMiddleware))
 
         # Command Handlers
         create_user_handler = CreateUserCommandHandler(
             _mediator=mediator,
             user_repository=container.resolve(IUserRepository),
         )
+        import_users_handler = ImportUsersCommandHandler(
+            _mediator=mediator,
+            user_repository=container.resolve(IUserRepository),
+        )
         user_login_handler = UserLoginCommandHandler(
             _mediator=mediator,
             user_repository=container.resolve(IUserRepository),
@@ -163,6 +502,7 @@ def _init_container() -> Container:
         change_username_handler = ChangeUsernameCommandHandler(
             _mediator=mediator,
             user_repository=container.resolve(IUserRepository),
+            availability_service=container.resolve(IUserAvailabilityService),
         )
         subscribe_to_email_sender_handler = SubscribeToEmailSenderCommandHandler(
             _mediator=mediator,
@@ -174,6 +514,18 @@ def _init_container() -> Container:
                 user_repository=container.resolve(IUserRepository),
             )
         )
+        bulk_subscribe_to_email_sender_handler = (
+            BulkSubscribeToEmailSenderCommandHandler(
+                _mediator=mediator,
+                user_repository=container.resolve(IUserRepository),
+            )
+        )
+        bulk_unsubscribe_from_email_sender_handler = (
+            BulkUnsubscribeFromEmailSenderCommandHandler(
+                _mediator=mediator,
+                user_repository=container.resolve(IUserRepository),
+            )
+        )
         restore_user_handler = RestoreUserCommandHandler(
             _mediator=mediator,
             user_repository=container.resolve(IUserRepository),
@@ -186,6 +538,10 @@ def _init_container() -> Container:
             CreateUserCommand,
             [create_user_handler],
         )
+        mediator.register_command(
+            ImportUsersCommand,
+            [import_users_handler],
+        )
         mediator.register_command(
             UserLoginCommand,
             [user_login_handler],
@@ -206,6 +562,14 @@ def _init_container() -> Container:
             UnsubscribeFromEmailSenderCommand,
             [unsubscribe_from_email_sender_handler],
         )
+        mediator.register_command(
+            BulkSubscribeToEmailSenderCommand,
+            [bulk_subscribe_to_email_sender_handler],
+        )
+        mediator.register_command(
+            BulkUnsubscribeFromEmailSenderCommand,
+            [bulk_unsubscribe_from_email_sender_handler],
+        )
         mediator.register_command(
             RestoreUserCommand,
             [restore_user_handler],
@@ -218,20 +582,67 @@ def _init_container() -> Container:
         # Event Handlers
         user_subscribed_event_handler = UserSubscribedEventHandler(
             broker_topic=settings.user_subscribed_event_topic,
-            message_broker=container.resolve(IMessageBroker),
+            message_broker=container.resolve(BatchingMessageBroker),
+            envelope_registry=container.resolve(EventEnvelopeRegistry),
         )
         user_unsubscribed_event_handler = UserUnsubscribedEventHandler(
             broker_topic=settings.user_unsubscribed_event_topic,
-            message_broker=container.resolve(IMessageBroker),
+            message_broker=container.resolve(BatchingMessageBroker),
+            envelope_registry=container.resolve(EventEnvelopeRegistry),
+        )
+        # The same events keyed by user_oid on the compacted topic, where the
+        # latest one per user is that user's subscription state.
+        subscription_state_subscribed_handler = UserSubscribedEventHandler(
+            broker_topic=settings.user_subscription_state_topic,
+            message_broker=container.resolve(BatchingMessageBroker),
+            envelope_registry=container.resolve(EventEnvelopeRegistry),
+        )
+        subscription_state_unsubscribed_handler = UserUnsubscribedEventHandler(
+            broker_topic=settings.user_subscription_state_topic,
+            message_broker=container.resolve(BatchingMessageBroker),
+            envelope_registry=container.resolve(EventEnvelopeRegistry),
         )
         mediator.register_event(
             UserSubscribedEvent,
-            [user_subscribed_event_handler],
+            [user_subscribed_event_handler, subscription_state_subscribed_handler],
         )
         mediator.register_event(
             UserUnsubscribedEvent,
-            [user_unsubscribed_event_handler],
+            [user_unsubscribed_event_handler, subscription_state_unsubscribed_handler],
+        )
+
+        user_created_availability_handler = UserCreatedAvailabilityEventHandler(
+            message_broker=container.resolve(IMessageBroker),
+            availability_service=container.resolve(IUserAvailabilityService),
+        )
+        user_changed_username_availability_handler = (
+            UserChangedUsernameAvailabilityEventHandler(
+                message_broker=container.resolve(IMessageBroker),
+                availability_service=container.resolve(IUserAvailabilityService),
+            )
+        )
+        mediator.register_event(
+            UserCreatedEvent,
+            [user_created_availability_handler],
         )
+        mediator.register_event(
+            UserChangedUsernameEvent,
+            [user_changed_username_availability_handler],
+        )
+
+        if settings.QUERY_CACHE_ENABLED:
+            query_cache_invalidation_handler = container.resolve(
+                UserQueryCacheInvalidationEventHandler
+            )
+            for user_event in (
+                UserCreatedEvent,
+                UserChangedUsernameEvent,
+                UserSubscribedEvent,
+                UserUnsubscribedEvent,
+                UserDeletedEvent,
+                RestoreUserEvent,
+            ):
+                mediator.register_event(user_event, [query_cache_invalidation_handler])
 
         # Query Handlers
         mediator.register_query(
@@ -242,10 +653,19 @@ def _init_container() -> Container:
             GetUserByIdQuery,
             container.resolve(GetUserByIdQueryHandler),
         )
+        mediator.register_query(
+            CheckMailDomainsQuery,
+            container.resolve(CheckMailDomainsQueryHandler),
+        )
 
         return mediator
 
-    container.register(Mediator, factory=init_mediator)
-    container.register(EventMediator, factory=init_mediator)
+    # Built once: handlers are stateless and every request shares them.
+    container.register(Mediator, factory=init_mediator, scope=Scope.singleton)
+    container.register(
+        EventMediator,
+        factory=lambda: container.resolve(Mediator),
+        scope=Scope.singleton,
+    )
 
     return container
@@ -1,19 +1,35 @@
+import asyncio
 from collections import defaultdict
 from collections.abc import Iterable
+from contextlib import nullcontext
 from dataclasses import dataclass, field
+from functools import partial
+from time import perf_counter
+from typing import Any
 
 from domain.events.base import BaseEvent
+from infrastructure.message_brokers.batching import BatchingMessageBroker
+from infrastructure.metrics.latency import LatencyRegistry
+from infrastructure.tracing.tracer import Tracer
+from infrastructure.uow.base import IUnitOfWork
 from logic.commands.base import CR, CT, BaseCommand, CommandHandler
 from logic.events.base import ER, ET, EventHandler
 from logic.exceptions.mediator import (
     CommandHandlersNotRegisteredException,
+    EventHandlersFailedException,
+    QueryHandlersNotRegisteredException,
 )
 from logic.mediator.command import CommandMediator
 from logic.mediator.event import EventMediator
+from logic.mediator.middlewares import CallNext, IMediatorMiddleware, Message
 from logic.mediator.query import QueryMediator
 from logic.queries.base import QR, QT, BaseQuery, BaseQueryHandler
 
 
+# Event handler invocations that must run in order: (result slot, handler, event).
+EventChain = list[tuple[int, EventHandler, BaseEvent]]
+
+
 @dataclass(eq=False)
 class Mediator(EventMediator, CommandMediator, QueryMediator):
     events_map: dict[ET, list[EventHandler]] = field(
@@ -29,37 +45,136 @@ class Mediator(EventMediator, CommandMediator, QueryMediator):
         default_factory=dict,
         kw_only=True,
     )
+    unit_of_work: IUnitOfWork | None = field(default=None, kw_only=True)
+    # Messages sent by the handlers of one `publish` go out as one batch.
+    message_broker: BatchingMessageBroker | None = field(default=None, kw_only=True)
+    concurrent_publish: bool = field(default=False, kw_only=True)
+    middlewares: list[IMediatorMiddleware] = field(default_factory=list, kw_only=True)
+    event_handler_latencies: LatencyRegistry = field(
+        default_factory=LatencyRegistry, kw_only=True
+    )
+    tracer: Tracer = field(default_factory=Tracer, kw_only=True)
+
+    # Dispatch tables compiled at registration time: a plain dict lookup of
+    # an immutable tuple per call, without touching the defaultdicts above.
+    _events_table: dict[type, tuple[EventHandler, ...]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _commands_table: dict[type, tuple[CommandHandler, ...]] = field(
+        default_factory=dict, init=False, repr=False
+    )
 
     def register_event(
         self, event: ET, event_handlers: Iterable[EventHandler[ET, ER]]
     ) -> ER:
         self.events_map[event].extend(event_handlers)
+        self._events_table[event] = tuple(self.events_map[event])
 
     def register_command(
         self, command: CT, command_handlers: Iterable[CommandHandler[CT, CR]]
     ) -> CR:
         self.commands_map[command].extend(command_handlers)
+        self._commands_table[command] = tuple(self.commands_map[command])
 
     def register_query(self, query: QT, query_handler: BaseQueryHandler[QT, QR]) -> QR:
         self.queries_map[query] = query_handler
 
+    def add_middleware(self, middleware: IMediatorMiddleware) -> None:
+        """Middlewares run in the order they were added, outermost first."""
+        self.middlewares.append(middleware)
+
     async def publish(self, events: Iterable[BaseEvent]) -> Iterable[ER]:
         if not events:
             raise Exception(events)
-        result = []
-        for event in events:
-            handlers: Iterable[EventHandler] = self.events_map[event.__class__]
-            result.extend([await handler.handle(event) for handler in handlers])
 
-        return result
+        batch = self.message_broker.batch() if self.message_broker else nullcontext()
+        async with batch:
+            if self.concurrent_publish:
+                return await self._publish_concurrently(events)
+
+            result = []
+            for event in events:
+                handlers = self._events_table.get(event.__class__, ())
+                result.extend(
+                    [await self._handle_event(handler, event) for handler in handlers]
+                )
+
+            return result
 
     async def handle_command(self, command: BaseCommand) -> Iterable[CR]:
         command_type = command.__class__
-        handlers = self.commands_map.get(command_type)
+        handlers = self._commands_table.get(command_type)
         if not handlers:
             raise CommandHandlersNotRegisteredException(command_type)
 
-        return [await handler.handle(command) for handler in handlers]
+        return await self._run_middlewares(
+            command, partial(self._execute_command, command, handlers)
+        )
 
     async def handle_query(self, query: BaseQuery) -> QR:
-        return await self.queries_map[query.__class__].handle(query=query)
+        query_type = query.__class__
+        handler = self.queries_map.get(query_type)
+        if handler is None:
+            raise QueryHandlersNotRegisteredException(query_type)
+
+        return await self._run_middlewares(query, partial(handler.handle, query=query))
+
+    async def _execute_command(
+        self, command: BaseCommand, handlers: tuple[CommandHandler, ...]
+    ) -> list[CR]:
+        transaction = self.unit_of_work.begin() if self.unit_of_work else nullcontext()
+        async with transaction:
+            return [await handler.handle(command) for handler in handlers]
+
+    async def _run_middlewares(self, message: Message, call_next: CallNext) -> Any:
+        for middleware in reversed(self.middlewares):
+            call_next = partial(middleware, message, call_next)
+
+        return await call_next()
+
+    async def _publish_concurrently(self, events: Iterable[BaseEvent]) -> list[ER]:
+        # One chain per (aggregate, handler): a handler still sees the events
+        # of one aggregate in order, everything else runs concurrently.
+        chains: dict[tuple[str, int], EventChain] = defaultdict(list)
+        slot = 0
+        for event in events:
+            for handler in self._events_table.get(event.__class__, ()):
+                chain_key = (self._get_aggregate_key(event), id(handler))
+                chains[chain_key].append((slot, handler, event))
+                slot += 1
+
+        results: list[Any] = [None] * slot
+        errors: list[Exception] = []
+
+        async def run_chain(chain: EventChain) -> None:
+            for chain_slot, handler, event in chain:
+                try:
+                    results[chain_slot] = await self._handle_event(handler, event)
+                except Exception as error:
+                    # Later events of this aggregate would be delivered out of
+                    # order, so the chain stops; other chains keep running.
+                    errors.append(error)
+                    return
+
+        await asyncio.gather(*(run_chain(chain) for chain in chains.values()))
+
+        if errors:
+            raise EventHandlersFailedException(errors)
+
+        return results
+
+    async def _handle_event(self, handler: EventHandler, event: BaseEvent) -> ER:
+        started_at = perf_counter()
+        try:
+            with self.tracer.start_span(
+                handler.__class__.__name__, event=event.__class__.__name__
+            ):
+                return await handler.handle(event)
+        finally:
+            self.event_handler_latencies.observe(
+                handler.__class__.__name__, perf_counter() - started_at
+            )
+
+    @staticmethod
+    def _get_aggregate_key(event: BaseEvent) -> str:
+        return getattr(event, "user_oid", None) or event.event_id
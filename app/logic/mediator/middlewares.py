@@ -0,0 +1,68 @@
+import logging
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any
+
+from infrastructure.metrics.latency import LatencyRegistry
+from infrastructure.tracing.tracer import Tracer
+from logic.commands.base import BaseCommand
+from logic.queries.base import BaseQuery
+
+
+logger = logging.getLogger(__name__)
+
+Message = BaseCommand | BaseQuery
+CallNext = Callable[[], Awaitable[Any]]
+
+
+class IMediatorMiddleware(ABC):
+    """Wraps command and query handling. Call `call_next()` to continue the
+    chain and return (or transform) its result."""
+
+    @abstractmethod
+    async def __call__(self, message: Message, call_next: CallNext) -> Any: ...
+
+
+@dataclass
+class LatencyMiddleware(IMediatorMiddleware):
+    """Records a latency histogram per command and query type."""
+
+    registry: LatencyRegistry = field(default_factory=LatencyRegistry)
+
+    async def __call__(self, message: Message, call_next: CallNext) -> Any:
+        started_at = perf_counter()
+        try:
+            return await call_next()
+        finally:
+            self.registry.observe(
+                message.__class__.__name__, perf_counter() - started_at
+            )
+
+
+@dataclass
+class TracingMiddleware(IMediatorMiddleware):
+    """Opens a span per command and query under the current (request) span."""
+
+    tracer: Tracer
+
+    async def __call__(self, message: Message, call_next: CallNext) -> Any:
+        with self.tracer.start_span(message.__class__.__name__):
+            return await call_next()
+
+
+@dataclass
+class SlowCallLoggingMiddleware(IMediatorMiddleware):
+    threshold: float
+
+    async def __call__(self, message: Message, call_next: CallNext) -> Any:
+        started_at = perf_counter()
+        try:
+            return await call_next()
+        finally:
+            elapsed = perf_counter() - started_at
+            if elapsed >= self.threshold:
+                logger.warning(
+                    "Slow %s took %.3fs", message.__class__.__name__, elapsed
+                )
@@ -0,0 +1,66 @@
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from infrastructure.cache.memory import TTLLRUCache
+from logic.mediator.middlewares import CallNext, IMediatorMiddleware, Message
+from logic.queries.base import BaseQuery
+
+
+@dataclass
+class QueryResultCache:
+    """TTL/LRU cache of query results, one namespace per query type.
+
+    Queries are keyed by their repr, which covers every dataclass field
+    including nested filters.
+    """
+
+    query_types: Iterable[type[BaseQuery]]
+    maxsize: int
+    ttl: float
+    _caches: dict[type[BaseQuery], TTLLRUCache] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._caches = {
+            query_type: TTLLRUCache(maxsize=self.maxsize, ttl=self.ttl)
+            for query_type in self.query_types
+        }
+
+    def is_cacheable(self, query: Message) -> bool:
+        return query.__class__ in self._caches
+
+    async def get(self, query: BaseQuery) -> Any | None:
+        return await self._caches[query.__class__].get(repr(query))
+
+    async def set(self, query: BaseQuery, result: Any) -> None:
+        await self._caches[query.__class__].set(repr(query), result)
+
+    async def invalidate(self, query: BaseQuery) -> None:
+        if self.is_cacheable(query):
+            await self._caches[query.__class__].delete(repr(query))
+
+    async def invalidate_type(self, query_type: type[BaseQuery]) -> None:
+        if query_type in self._caches:
+            await self._caches[query_type].clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            query_type.__name__: cache.stats.as_dict()
+            for query_type, cache in self._caches.items()
+        }
+
+
+@dataclass
+class QueryCacheMiddleware(IMediatorMiddleware):
+    cache: QueryResultCache
+
+    async def __call__(self, message: Message, call_next: CallNext) -> Any:
+        if not self.cache.is_cacheable(message):
+            return await call_next()
+
+        result = await self.cache.get(message)
+        if result is None:
+            result = await call_next()
+            await self.cache.set(message, result)
+
+        return result
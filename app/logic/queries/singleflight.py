@@ -0,0 +1,54 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any
+
+from logic.mediator.middlewares import CallNext, IMediatorMiddleware, Message
+from logic.queries.base import BaseQuery
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    executed: int = 0
+
+    @property
+    def collapsed(self) -> int:
+        return self.calls - self.executed
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "executed": self.executed,
+            "collapsed": self.collapsed,
+        }
+
+
+@dataclass
+class SingleFlightMiddleware(IMediatorMiddleware):
+    """Coalesces identical queries that are in flight at the same time:
+    the first caller runs the handler, later ones await its result.
+
+    The handler runs in its own task, so a cancelled caller does not cancel
+    the call the others are waiting on.
+    """
+
+    stats: SingleFlightStats = field(default_factory=SingleFlightStats)
+    _in_flight: dict[str, asyncio.Future] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    async def __call__(self, message: Message, call_next: CallNext) -> Any:
+        if not isinstance(message, BaseQuery):
+            return await call_next()
+
+        self.stats.calls += 1
+        key = f"{message.__class__.__name__}:{message!r}"
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            self.stats.executed += 1
+            in_flight = asyncio.ensure_future(call_next())
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        return await asyncio.shield(in_flight)
@@ -1,3 +1,4 @@
+import asyncio
 from collections.abc import Iterable
 from dataclasses import dataclass
 
@@ -10,6 +11,7 @@ from infrastructure.repositories.users.filters.users import (
 )
 from logic.exceptions.users import UserNotFoundException
 from logic.queries.base import BaseQuery, BaseQueryHandler
+from validate_email import validate_email
 
 
 @dataclass(frozen=True)
@@ -40,3 +42,31 @@ class GetUserByIdQueryHandler(BaseQueryHandler):
             raise UserNotFoundException(value=query.user_oid)
 
         return user
+
+
+@dataclass(frozen=True)
+class CheckMailDomainsQuery(BaseQuery):
+    domains: frozenset[str]
+
+
+@dataclass(frozen=True)
+class CheckMailDomainsQueryHandler(BaseQueryHandler):
+    """Tells for every domain whether it accepts mail.
+
+    Only DNS is consulted, without the SMTP probe; the lookups run in
+    threads, all at once.
+    """
+
+    async def handle(self, query: CheckMailDomainsQuery) -> dict[str, bool]:
+        domains = list(query.domains)
+        verdicts = await asyncio.gather(
+            *(asyncio.to_thread(self._is_domain_valid, domain) for domain in domains)
+        )
+
+        return dict(zip(domains, verdicts))
+
+    @staticmethod
+    def _is_domain_valid(domain: str) -> bool:
+        return bool(
+            validate_email(email_address=f"postmaster@{domain}", check_smtp=False)
+        )
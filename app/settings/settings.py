@@ -1,3 +1,5 @@
+from typing import Any
+
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -17,9 +19,73 @@ class Settings(BaseSettings):
     TEST_DB_HOST: str
     TEST_DB_PORT: int
 
+    # "kafka", or "memory" to keep every message inside this process
+    MESSAGE_BROKER_BACKEND: str = Field(default="kafka")
+    MESSAGE_BROKER_MEMORY_PARTITIONS: int = Field(default=4)
+    MESSAGE_BROKER_CONSUME_BATCH_SIZE: int = Field(default=500)
+    CONSUMER_MAX_ATTEMPTS: int = Field(default=3)
+    CONSUMER_RETRY_BACKOFF: float = Field(default=0.2)
+    CONSUMER_RETRY_MAX_BACKOFF: float = Field(default=5.0)
+    CONSUMER_RESTART_BACKOFF: float = Field(default=1.0)
+    CONSUMER_RESTART_MAX_BACKOFF: float = Field(default=30.0)
+    CONSUMER_DRAIN_TIMEOUT: float = Field(default=10.0)
+
+    # "json" or "compact"; every consumer reads both.
+    EVENT_ENCODING: str = Field(default="json")
+
     KAFKA_URL: str = Field(default="kafka:29092")
+    KAFKA_REPLICATION_FACTOR: int = Field(default=1)
     user_subscribed_event_topic: str = Field(default="user_subscribed_topic")
     user_unsubscribed_event_topic: str = Field(default="user_unsubscribed_topic")
+    user_events_dead_letter_topic: str = Field(default="user_events_dead_letter")
+    user_cache_invalidation_topic: str = Field(default="user_cache_invalidation")
+    # Log-compacted: the latest subscribe/unsubscribe event of every user.
+    user_subscription_state_topic: str = Field(default="user_subscription_state")
+    user_subscription_state_partitions: int = Field(default=4)
+
+    # "database" scans users at startup, "topic" replays the state topic.
+    SCHEDULER_BOOTSTRAP_MODE: str = Field(default="database")
+
+    # "0", "1" or "all"; idempotence requires "all".
+    KAFKA_PRODUCER_ACKS: str = Field(default="all")
+    KAFKA_PRODUCER_ENABLE_IDEMPOTENCE: bool = Field(default=True)
+    KAFKA_PRODUCER_LINGER_MS: int = Field(default=10)
+    KAFKA_PRODUCER_MAX_BATCH_SIZE: int = Field(default=256 * 1024)
+    # lz4, snappy and zstd need their codec packages installed.
+    KAFKA_PRODUCER_COMPRESSION_TYPE: str | None = Field(default="gzip")
+
+    @property
+    def KAFKA_PRODUCER_OPTIONS(self) -> dict[str, Any]:
+        acks = self.KAFKA_PRODUCER_ACKS
+        return {
+            "acks": int(acks) if acks.isdigit() else acks,
+            "enable_idempotence": self.KAFKA_PRODUCER_ENABLE_IDEMPOTENCE,
+            "linger_ms": self.KAFKA_PRODUCER_LINGER_MS,
+            "max_batch_size": self.KAFKA_PRODUCER_MAX_BATCH_SIZE,
+            "compression_type": self.KAFKA_PRODUCER_COMPRESSION_TYPE,
+        }
+
+    MEDIATOR_CONCURRENT_PUBLISH: bool = Field(default=True)
+    MEDIATOR_BATCH_PUBLISH: bool = Field(default=True)
+    MEDIATOR_SLOW_CALL_THRESHOLD: float = Field(default=0.5)
+
+    # "none", "memory" (see /healthcheck/traces/{trace_id}/) or "file"
+    TRACING_EXPORTER: str = Field(default="none")
+    TRACING_FILE_PATH: str = Field(default="traces.jsonl")
+    TRACING_MEMORY_MAX_SPANS: int = Field(default=10000)
+    TRACING_FILE_MAX_QUEUED_SPANS: int = Field(default=10000)
+
+    OUTBOX_RELAY_BATCH_SIZE: int = Field(default=500)
+    OUTBOX_RELAY_POLL_INTERVAL: float = Field(default=0.5)
+    # Seconds a sent outbox row is kept, e.g. to investigate a delivery.
+    OUTBOX_SENT_RETENTION: float = Field(default=86400.0)
+    OUTBOX_CLEANUP_INTERVAL: float = Field(default=60.0)
+    OUTBOX_CLEANUP_BATCH_SIZE: int = Field(default=10000)
+
+    # Defaults of `python -m application.cli.backfill`
+    BACKFILL_CHUNK_SIZE: int = Field(default=1000)
+    BACKFILL_MAX_USERS_PER_SECOND: float = Field(default=2000.0)
+    BACKFILL_CHECKPOINT_PATH: str = Field(default="user_events_backfill.json")
 
     CONFIRM_URL: str
     UNSUBSCRIBE_URL: str
@@ -40,6 +106,34 @@ class Settings(BaseSettings):
     REDIS_PORT: int = Field(default=6379)
     REDIS_DB: int = Field(default=0)
 
+    USER_CACHE_ENABLED: bool = Field(default=True)
+    USER_CACHE_SIZE: int = Field(default=10_000)
+    USER_CACHE_TTL: float = Field(default=30.0)
+    USER_CACHE_REDIS_ENABLED: bool = Field(default=False)
+    USER_CACHE_REDIS_TTL: int = Field(default=300)
+    # Longer than a cache miss takes to load a user from the database.
+    USER_CACHE_TOMBSTONE_TTL: float = Field(default=5.0)
+
+    USER_LOADER_ENABLED: bool = Field(default=True)
+    USER_LOADER_TICK: float = Field(default=0.002)
+    USER_LOADER_MAX_BATCH_SIZE: int = Field(default=500)
+
+    USER_IMPORT_BATCH_SIZE: int = Field(default=1000)
+    # Larger import bodies are spooled to a temporary file.
+    USER_IMPORT_SPOOL_MEMORY_SIZE: int = Field(default=8 * 1024 * 1024)
+    # Larger import bodies are refused with 413.
+    USER_IMPORT_MAX_BODY_SIZE: int = Field(default=256 * 1024 * 1024)
+
+    QUERY_CACHE_ENABLED: bool = Field(default=True)
+    QUERY_CACHE_SIZE: int = Field(default=1024)
+    QUERY_CACHE_TTL: float = Field(default=5.0)
+
+    # "redis" (shared by every instance), "memory" (this process only, for a
+    # single instance) or "none" to always ask the database
+    AVAILABILITY_FILTER_BACKEND: str = Field(default="redis")
+    AVAILABILITY_FILTER_CAPACITY: int = Field(default=1_000_000)
+    AVAILABILITY_FILTER_ERROR_RATE: float = Field(default=0.01)
+
     @property
     def DB_URL(self) -> str:
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"